@@ -1,38 +1,125 @@
-from machine import Pin, time_pulse_us
+from machine import Pin, Timer, time_pulse_us
 import time
 
+from obstacle import pulse_to_cm, echo_timeout_us, DistanceFilter, AlertCadence
+
+try:
+    import micropython
+    micropython.alloc_emergency_exception_buf(100)
+    schedule = micropython.schedule
+except ImportError:  # desktop Python with fake_machine
+    micropython = None
+    schedule = lambda fn, arg: fn(arg)
+
+try:
+    from time import ticks_ms, ticks_diff, sleep_us, sleep_ms
+except ImportError:  # desktop Python
+    ticks_ms = lambda: int(time.monotonic() * 1000)
+    ticks_diff = lambda a, b: a - b
+    sleep_us = lambda us: time.sleep(us / 1000000)
+    sleep_ms = lambda ms: time.sleep(ms / 1000)
+
 # Pins
-TRIG = Pin(3, Pin.OUT)   # TRIG on GP3
-ECHO = Pin(2, Pin.IN)    # ECHO on GP2
-led = Pin(1, Pin.OUT)   # Onboard LED
-
-# Function to measure distance in cm
-def get_distance():
-    TRIG.low()
-    time.sleep_us(2)
-    TRIG.high()
-    time.sleep_us(10)
-    TRIG.low()
-
-    # Measure echo pulse duration
-    duration = time_pulse_us(ECHO, 1, 30000)  # timeout 30ms
-
-    # Convert to distance (cm)
-    distance = (duration * 0.0343) / 2
-    return distance
-
-while True:
-    dist = get_distance()
-    print("Distance:", dist, "cm")  # <-- Serial monitor output
-
-    if dist < 200:  
-        led.value(1)
-        time.sleep(0.1)
-        led.value(0)
-        led.value(1)
-        time.sleep(0.1)
-        led.value(0)
-        time.sleep(0.2)
-    else:
-        led.value(0)  # LED off
-        time.sleep(0.1)
+TRIG_PIN = 3     # TRIG on GP3
+ECHO_PIN = 2     # ECHO on GP2
+LED_PIN = 1      # Onboard LED
+HAPTIC_PIN = None  # GPIO of a vibration motor, if fitted
+
+# Sampling (the HC-SR04 needs about 60 ms between pings)
+SAMPLE_HZ = 15
+FILTER_WINDOW = 5
+FILTER_ALPHA = 0.4
+MAX_INVALID = 5  # timeouts in a row before "nothing in range"
+
+# Alerts
+ALERT_DISTANCE = 200  # cm; closer than this starts the blinking
+NEAR_DISTANCE = 20    # cm; closer than this is solid on
+ALERT_TICK_MS = 20
+PRINT_INTERVAL_MS = 500
+
+class ObstacleDetector:
+    """Samples the sensor and drives the alert on two independent timers"""
+
+    def __init__(self, sample_hz=SAMPLE_HZ, trig=TRIG_PIN, echo=ECHO_PIN, led=LED_PIN,
+                 haptic=HAPTIC_PIN):
+        self.sample_hz = sample_hz
+        self.trig = Pin(trig, Pin.OUT)
+        self.echo = Pin(echo, Pin.IN)
+        self.outputs = [Pin(led, Pin.OUT)]
+        if haptic is not None:
+            self.outputs.append(Pin(haptic, Pin.OUT))
+        self.timeout_us = echo_timeout_us()
+        self.filter = DistanceFilter(FILTER_WINDOW, FILTER_ALPHA, MAX_INVALID)
+        self.cadence = AlertCadence(ALERT_DISTANCE, NEAR_DISTANCE, ticks_diff=ticks_diff)
+        self.output_on = False
+        self.skipped = 0
+
+        # Bound methods created once; making them inside an interrupt would allocate
+        self._sample_ref = self.sample
+        self._alert_ref = self.alert
+        self._sample_timer = Timer()
+        self._alert_timer = Timer()
+
+    def measure(self):
+        """One echo pulse in microseconds (negative on timeout)"""
+        self.trig.low()
+        sleep_us(2)
+        self.trig.high()
+        sleep_us(10)
+        self.trig.low()
+        return time_pulse_us(self.echo, 1, self.timeout_us)
+
+    def sample(self, _=None):
+        self.filter.add(pulse_to_cm(self.measure()))
+
+    def alert(self, _=None):
+        on = self.cadence.update(self.filter.distance, ticks_ms())
+        if on != self.output_on:
+            self.output_on = on
+            for pin in self.outputs:
+                pin.value(1 if on else 0)
+
+    def _on_sample_tick(self, timer):
+        # The echo wait blocks for up to timeout_us, so it runs outside the interrupt
+        try:
+            schedule(self._sample_ref, 0)
+        except RuntimeError:  # schedule queue full
+            self.skipped += 1
+
+    def _on_alert_tick(self, timer):
+        try:
+            schedule(self._alert_ref, 0)
+        except RuntimeError:
+            self.skipped += 1
+
+    def start(self):
+        self._sample_timer.init(freq=self.sample_hz, mode=Timer.PERIODIC,
+                                callback=self._on_sample_tick)
+        self._alert_timer.init(period=ALERT_TICK_MS, mode=Timer.PERIODIC,
+                               callback=self._on_alert_tick)
+        return self
+
+    def stop(self):
+        self._sample_timer.deinit()
+        self._alert_timer.deinit()
+        for pin in self.outputs:
+            pin.value(0)
+
+def main():
+    detector = ObstacleDetector().start()
+    try:
+        while True:
+            dist = detector.filter.distance
+            # Serial monitor output
+            if dist is None:
+                print("Distance: out of range")
+            else:
+                print("Distance:", round(dist, 1), "cm")
+            sleep_ms(PRINT_INTERVAL_MS)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        detector.stop()
+
+if __name__ == "__main__":
+    main()
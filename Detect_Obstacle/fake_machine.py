@@ -0,0 +1,84 @@
+"""Desktop stand-in for MicroPython's machine module.
+
+Lets detect_obstacle.py run without a board:
+
+    import sys, fake_machine
+    sys.modules['machine'] = fake_machine
+    fake_machine.set_distance(lambda t: 150 - 20 * t)  # cm at t seconds
+    import detect_obstacle
+
+Timers call back from threads, time_pulse_us answers from the scripted
+distance (None = no echo, which times out like the real sensor), and
+output pins record when they changed.
+"""
+import threading
+import time
+
+_start = time.monotonic()
+_distance = lambda t: None
+
+def set_distance(fn):
+    """fn(seconds since start) -> distance in cm, or None for no echo"""
+    global _distance
+    _distance = fn
+
+def time_pulse_us(pin, level, timeout_us):
+    distance = _distance(time.monotonic() - _start)
+    if distance is None:
+        time.sleep(timeout_us / 1000000)
+        return -2
+    duration = int(distance * 2 / 0.0343)
+    if duration > timeout_us:
+        time.sleep(timeout_us / 1000000)
+        return -2
+    time.sleep(duration / 1000000)
+    return duration
+
+class Pin:
+    IN = 0
+    OUT = 1
+
+    def __init__(self, id, mode=IN):
+        self.id = id
+        self.mode = mode
+        self._value = 0
+        self.changes = []   # (seconds since start, value)
+
+    def value(self, value=None):
+        if value is None:
+            return self._value
+        if value != self._value:
+            self.changes.append((time.monotonic() - _start, value))
+        self._value = value
+
+    def low(self):
+        self.value(0)
+
+    def high(self):
+        self.value(1)
+
+class Timer:
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, id=-1):
+        self._stop = None
+
+    def init(self, mode=PERIODIC, freq=None, period=None, callback=None):
+        self.deinit()
+        interval = 1 / freq if freq else period / 1000
+        stop = self._stop = threading.Event()
+
+        def run():
+            next_tick = time.monotonic() + interval
+            while not stop.wait(max(0, next_tick - time.monotonic())):
+                callback(self)
+                if mode == Timer.ONE_SHOT:
+                    break
+                next_tick += interval
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def deinit(self):
+        if self._stop is not None:
+            self._stop.set()
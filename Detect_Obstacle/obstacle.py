@@ -0,0 +1,141 @@
+# Obstacle sensing logic shared by the board and desktop tests.
+#
+# Nothing here touches hardware or MicroPython-only modules. Readings
+# come in as echo pulse durations and the alert state goes out as a bool,
+# so detect_obstacle.py (or a test with fake_machine.py) supplies the I/O.
+from array import array
+
+SOUND_CM_PER_US = 0.0343
+MIN_RANGE_CM = 2      # HC-SR04 blind zone
+MAX_RANGE_CM = 400    # beyond this the echo is unreliable
+
+def pulse_to_cm(duration_us, min_cm=MIN_RANGE_CM, max_cm=MAX_RANGE_CM):
+    """Distance for an echo pulse, or None for a timeout or out-of-range echo
+
+    time_pulse_us returns -1 or -2 on timeout.
+    """
+    if duration_us < 0:
+        return None
+    distance = duration_us * SOUND_CM_PER_US / 2
+    if distance < min_cm or distance > max_cm:
+        return None
+    return distance
+
+def echo_timeout_us(max_cm=MAX_RANGE_CM):
+    """Longest echo worth waiting for"""
+    return int(max_cm * 2 / SOUND_CM_PER_US) + 500
+
+class DistanceFilter:
+    """Median of the last `window` valid readings, smoothed with an EMA
+
+    The ring buffer and sort scratch are allocated once, so add() does
+    not allocate lists. After max_invalid timeouts in a row the distance
+    is reported as None: nothing within range.
+    """
+
+    def __init__(self, window=5, alpha=0.4, max_invalid=5):
+        self.window = window
+        self.alpha = alpha
+        self.max_invalid = max_invalid
+        self._ring = array('f', [0.0] * window)
+        self._scratch = array('f', [0.0] * window)
+        self._index = 0
+        self._filled = 0
+        self._invalid_run = 0
+        self.distance = None
+        self.valid = 0
+        self.invalid = 0
+
+    def reset(self):
+        self._index = 0
+        self._filled = 0
+        self.distance = None
+
+    def _median(self):
+        n = self._filled
+        scratch = self._scratch
+        for i in range(n):
+            scratch[i] = self._ring[i]
+        # Insertion sort: n is tiny and nothing is allocated
+        for i in range(1, n):
+            value = scratch[i]
+            j = i - 1
+            while j >= 0 and scratch[j] > value:
+                scratch[j + 1] = scratch[j]
+                j -= 1
+            scratch[j + 1] = value
+        if n % 2:
+            return scratch[n // 2]
+        return (scratch[n // 2 - 1] + scratch[n // 2]) / 2
+
+    def add(self, distance):
+        """Feed one reading (None for invalid); returns the filtered distance"""
+        if distance is None:
+            self.invalid += 1
+            self._invalid_run += 1
+            if self._invalid_run >= self.max_invalid:
+                self.reset()
+            return self.distance
+
+        self.valid += 1
+        self._invalid_run = 0
+        self._ring[self._index] = distance
+        self._index = (self._index + 1) % self.window
+        if self._filled < self.window:
+            self._filled += 1
+
+        median = self._median()
+        if self.distance is None:
+            self.distance = median
+        else:
+            self.distance += self.alpha * (median - self.distance)
+        return self.distance
+
+def _diff(a, b):
+    return a - b
+
+class AlertCadence:
+    """Blink/haptic pattern whose rate rises as the obstacle gets closer
+
+    Beyond alert_cm the output is off. At near_cm or closer it is on
+    solid. In between it pulses once per period, and the period runs
+    linearly from slow_ms (at alert_cm) down to fast_ms (at near_cm). The
+    period is recomputed on every tick, so an approaching obstacle
+    speeds the pattern up immediately.
+    """
+
+    def __init__(self, alert_cm=200, near_cm=20, slow_ms=1000, fast_ms=120, pulse_ms=60,
+                 ticks_diff=_diff):
+        self.alert_cm = alert_cm
+        self.near_cm = near_cm
+        self.slow_ms = slow_ms
+        self.fast_ms = fast_ms
+        self.pulse_ms = pulse_ms
+        self.ticks_diff = ticks_diff
+        self._cycle_start = None
+
+    def period_ms(self, distance):
+        """None for no alert, 0 for solid on, otherwise the pulse period"""
+        if distance is None or distance >= self.alert_cm:
+            return None
+        if distance <= self.near_cm:
+            return 0
+        fraction = (distance - self.near_cm) / (self.alert_cm - self.near_cm)
+        return int(self.fast_ms + fraction * (self.slow_ms - self.fast_ms))
+
+    def update(self, distance, now_ms):
+        """Output state (True = LED/motor on) at now_ms"""
+        period = self.period_ms(distance)
+        if period is None:
+            self._cycle_start = None
+            return False
+        if period == 0:
+            self._cycle_start = None
+            return True
+        if self._cycle_start is None:
+            self._cycle_start = now_ms
+        elapsed = self.ticks_diff(now_ms, self._cycle_start)
+        if elapsed >= period:
+            self._cycle_start = now_ms
+            elapsed = 0
+        return elapsed < min(self.pulse_ms, period // 2)
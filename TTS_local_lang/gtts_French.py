@@ -1,17 +1,14 @@
-from gtts import gTTS
 import os
+from multilingual_tts import synthesize
 
 # French text
 text = "Bonjour, je suis un programme Python qui parle français."
 
-# Convert text to speech
-tts = gTTS(text=text, lang='fr')
-
-# Save as mp3
-tts.save("output.mp3")
+# Convert text to speech (cached after the first run)
+path = synthesize(text, 'fr')
 
 # Play the audio (Windows)
-os.system("start output.mp3")
+os.system(f'start "" "{path}"')
 
 # For Linux/macOS, replace with:
-# os.system("xdg-open output.mp3")
+# os.system(f'xdg-open "{path}"')
@@ -1,6 +1,5 @@
-from gtts import gTTS
+from multilingual_tts import synthesize
 
 text = "Sannu! Yaya kake?"
-tts = gTTS(text=text, lang="ha")
-tts.save("hausa.mp3")
-print("✅ Hausa audio saved as hausa.mp3")
+path = synthesize(text, "ha")
+print(f"✅ Hausa audio saved as {path}")
@@ -0,0 +1,166 @@
+"""Multilingual speech synthesis with an on-disk audio cache.
+
+Audio is content-addressed: the file name is a SHA-256 of the text,
+language, voice settings and backend. A phrase is synthesised (one gTTS
+network round trip) only the first time it is needed. Files are written
+atomically, and the least recently used ones are evicted once the cache
+exceeds its size budget. The backend is pluggable. SilentBackend is an
+offline stand-in that writes short WAV files, for tests and for devices
+with no network.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import wave
+from collections import OrderedDict
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tts_cache')
+CACHE_MAX_BYTES = 50 * 1024 * 1024
+
+class GTTSBackend:
+    """Google TTS (needs network)"""
+    name = 'gtts'
+    extension = '.mp3'
+
+    def synthesize(self, text, lang, path, slow=False, tld='com'):
+        from gtts import gTTS
+        gTTS(text=text, lang=lang, slow=slow, tld=tld).save(path)
+
+class SilentBackend:
+    """Offline stand-in: writes silence whose length follows the text"""
+    name = 'silent'
+    extension = '.wav'
+    sample_rate = 16000
+
+    def __init__(self, seconds_per_char=0.01):
+        self.seconds_per_char = seconds_per_char
+        self.calls = 0
+
+    def synthesize(self, text, lang, path, **settings):
+        self.calls += 1
+        frames = int(self.sample_rate * self.seconds_per_char * max(1, len(text)))
+        with wave.open(path, 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(self.sample_rate)
+            wav.writeframes(b'\x00\x00' * frames)
+
+class AudioCache:
+    """Size-budgeted LRU cache of audio files"""
+
+    def __init__(self, folder=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(folder, exist_ok=True)
+
+        # path -> size, least recently used first (by modification time)
+        files = []
+        for name in os.listdir(folder):
+            path = os.path.join(folder, name)
+            if name.endswith('.tmp') or not os.path.isfile(path):
+                continue
+            st = os.stat(path)
+            files.append((st.st_mtime, path, st.st_size))
+        files.sort()
+        self._files = OrderedDict((path, size) for _, path, size in files)
+        self._bytes = sum(self._files.values())
+
+    @staticmethod
+    def key(text, lang, backend_name, settings):
+        data = json.dumps([text, lang, backend_name, settings], sort_keys=True,
+                          ensure_ascii=False)
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+    def stats(self):
+        return {'files': len(self._files), 'bytes': self._bytes,
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+    def get(self, key, extension):
+        """Cached path for key, or None"""
+        path = os.path.join(self.folder, key + extension)
+        with self._lock:
+            if path in self._files and os.path.exists(path):
+                self._files.move_to_end(path)
+                self.hits += 1
+                try:
+                    os.utime(path)  # keeps LRU order across restarts
+                except OSError:
+                    pass
+                return path
+            self._files.pop(path, None)
+            self.misses += 1
+            return None
+
+    def put(self, key, extension, write_fn):
+        """Write a file with write_fn(tmp_path), then move it into place"""
+        path = os.path.join(self.folder, key + extension)
+        fd, tmp = tempfile.mkstemp(dir=self.folder, suffix='.tmp')
+        os.close(fd)
+        try:
+            write_fn(tmp)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+        size = os.path.getsize(path)
+        with self._lock:
+            self._bytes -= self._files.pop(path, 0)
+            self._files[path] = size
+            self._bytes += size
+            self._evict(keep=path)
+        return path
+
+    def _evict(self, keep):
+        while self._bytes > self.max_bytes and len(self._files) > 1:
+            path, size = next(iter(self._files.items()))
+            if path == keep:
+                break
+            del self._files[path]
+            self._bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+class Synthesizer:
+    """Text -> cached audio file"""
+
+    def __init__(self, backend=None, cache=None):
+        self.backend = backend or GTTSBackend()
+        self.cache = cache or AudioCache()
+
+    def synthesize(self, text, lang, **settings):
+        """Path of an audio file for text, synthesising only on a cache miss"""
+        key = AudioCache.key(text, lang, self.backend.name, settings)
+        path = self.cache.get(key, self.backend.extension)
+        if path:
+            return path
+        return self.cache.put(
+            key, self.backend.extension,
+            lambda tmp: self.backend.synthesize(text, lang, tmp, **settings))
+
+_default = None
+
+def get_synthesizer():
+    """Shared gTTS synthesizer with the default cache"""
+    global _default
+    if _default is None:
+        _default = Synthesizer()
+    return _default
+
+def synthesize(text, lang, **settings):
+    return get_synthesizer().synthesize(text, lang, **settings)
+
+def play(path):
+    """Play an audio file (blocks until done)"""
+    from playsound import playsound
+    playsound(path)
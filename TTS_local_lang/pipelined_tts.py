@@ -0,0 +1,163 @@
+"""Sentence-pipelined synthesis and playback for long texts.
+
+The text is split into sentences and synthesised on a small thread
+pool, at most `lookahead` chunks ahead of playback. Chunk N plays while
+chunk N+1 is being produced. With sounddevice and pydub installed, each
+chunk is decoded to PCM on the synthesis worker too, and the player only
+writes samples into one open output stream, so there are no gaps
+between sentences. Otherwise each chunk is played with playsound.
+cancel() stops playback between audio blocks and drops chunks that have
+not been synthesised yet. Call it when the user starts a new capture.
+"""
+import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from multilingual_tts import get_synthesizer
+
+MAX_CHUNK_CHARS = 200
+SENTENCE_RE = re.compile(r'[^.!?;\n]+[.!?;]*')
+
+def split_sentences(text, max_chars=MAX_CHUNK_CHARS):
+    """Sentence-sized chunks, long sentences split at commas or spaces"""
+    chunks = []
+    for sentence in SENTENCE_RE.findall(text):
+        sentence = ' '.join(sentence.split())
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(',', 0, max_chars)
+            if cut <= 0:
+                cut = sentence.rfind(' ', 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            chunks.append(sentence[:cut + 1].strip())
+            sentence = sentence[cut + 1:].strip()
+        if sentence:
+            chunks.append(sentence)
+    return chunks
+
+class PlaysoundPlayer:
+    """One playsound call per chunk (small gap between chunks)"""
+
+    def open(self):
+        pass
+
+    def prepare(self, path):
+        return path
+
+    def play(self, path, cancelled):
+        from playsound import playsound
+        if not cancelled.is_set():
+            playsound(path)
+
+    def close(self):
+        pass
+
+class StreamPlayer:
+    """Writes pre-decoded chunks into a single open output stream"""
+    block_seconds = 0.1
+
+    def __init__(self):
+        import sounddevice
+        from pydub import AudioSegment
+        self._sounddevice = sounddevice
+        self._segment = AudioSegment
+        self._stream = None
+        self._format = None
+
+    def open(self):
+        self._stream = None
+        self._format = None
+
+    def prepare(self, path):
+        """Decode a chunk to ((rate, channels, sample width), PCM bytes)
+
+        Runs on the synthesis worker, so ffmpeg never delays playback.
+        """
+        audio = self._segment.from_file(path)
+        return (audio.frame_rate, audio.channels, audio.sample_width), audio.raw_data
+
+    def play(self, pcm, cancelled):
+        fmt, data = pcm
+        rate, channels, width = fmt
+        if self._stream is None or fmt != self._format:
+            self.close()
+            self._stream = self._sounddevice.RawOutputStream(
+                samplerate=rate, channels=channels,
+                dtype={1: 'int8', 2: 'int16', 4: 'int32'}[width])
+            self._stream.start()
+            self._format = fmt
+        block = int(rate * self.block_seconds) * channels * width
+        for start in range(0, len(data), block):
+            if cancelled.is_set():
+                return
+            self._stream.write(data[start:start + block])
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+
+def default_player():
+    try:
+        return StreamPlayer()
+    except (ImportError, OSError):  # OSError: sounddevice without PortAudio
+        return PlaysoundPlayer()
+
+class PipelinedSpeaker:
+    """Speak long texts sentence by sentence with synthesis running ahead"""
+
+    def __init__(self, synthesizer=None, player=None, lookahead=2, workers=2):
+        self.synthesizer = synthesizer or get_synthesizer()
+        self.player = player or default_player()
+        self.lookahead = max(1, lookahead)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='tts')
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()  # one readout at a time
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def _produce(self, chunk, lang, settings):
+        return self.player.prepare(self.synthesizer.synthesize(chunk, lang, **settings))
+
+    def speak(self, text, lang, **settings):
+        """Blocking readout; returns False if cancelled part way"""
+        self.cancel()
+        with self._lock:
+            cancelled = threading.Event()
+            self._cancelled = cancelled
+            chunks = deque(split_sentences(text))
+            pending = deque()
+
+            def fill():
+                while chunks and len(pending) < self.lookahead:
+                    pending.append(self._pool.submit(
+                        self._produce, chunks.popleft(), lang, settings))
+
+            self.player.open()
+            try:
+                fill()
+                while pending:
+                    audio = pending.popleft().result()
+                    if cancelled.is_set():
+                        break
+                    fill()
+                    self.player.play(audio, cancelled)
+            finally:
+                for future in pending:
+                    future.cancel()
+                self.player.close()
+            return not cancelled.is_set()
+
+    def speak_async(self, text, lang, **settings):
+        """Start a readout on a background thread"""
+        thread = threading.Thread(target=self.speak, args=(text, lang),
+                                  kwargs=settings, daemon=True)
+        thread.start()
+        return thread
+
+    def close(self):
+        self.cancel()
+        self._pool.shutdown(wait=False, cancel_futures=True)
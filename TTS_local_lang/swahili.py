@@ -1,6 +1,5 @@
-from gtts import gTTS
+from multilingual_tts import synthesize
 
 text = "Habari yako rafiki?"
-tts = gTTS(text=text, lang="sw")
-tts.save("swahili.mp3")
-print("✅ Swahili audio saved as swahili.mp3")
+path = synthesize(text, "sw")
+print(f"✅ Swahili audio saved as {path}")
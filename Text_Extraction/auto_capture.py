@@ -0,0 +1,110 @@
+"""Hands-free capture from a ring buffer of recent frames.
+
+Each frame is scored on a small grayscale thumbnail: Laplacian variance
+for sharpness and mean absolute difference to the previous frame for
+motion. Once the scene has been still for a few frames, the sharpest
+buffered frame is returned for OCR. The trigger then stays disarmed
+until the camera is pointed at something else: either the thumbnail
+changes a lot overall, or the ink on it does. Comparing ink catches a
+new sign on the same white background, where the grey difference is
+tiny because most of the frame is unchanged paper. The ink is aligned
+by phase correlation before it is compared, so hand shake does not
+count as a new scene.
+"""
+from collections import deque
+
+import cv2
+import numpy as np
+
+class AutoCapture:
+    """Pick the sharpest frame once the scene has been stable"""
+
+    def __init__(self, buffer_size=10, stable_frames=6, motion_threshold=3.0,
+                 min_sharpness=60.0, rearm_threshold=12.0, rearm_ink_change=0.35,
+                 ink_contrast=40, score_width=320):
+        self.stable_frames = stable_frames
+        self.motion_threshold = motion_threshold
+        self.min_sharpness = min_sharpness
+        self.rearm_threshold = rearm_threshold
+        self.rearm_ink_change = rearm_ink_change  # share of the ink that moved
+        self.ink_contrast = ink_contrast          # grey levels below the background
+        self.score_width = score_width
+
+        self._frames = deque(maxlen=max(buffer_size, stable_frames))
+        self._prev = None
+        self._stable = 0
+        self._captured_thumb = None  # thumbnail of the last auto-captured scene
+        self._captured_ink = None
+        self.triggers = 0
+
+    def reset(self):
+        self._frames.clear()
+        self._prev = None
+        self._stable = 0
+        self._captured_thumb = None
+        self._captured_ink = None
+
+    def _thumbnail(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        h, w = gray.shape[:2]
+        size = (self.score_width, max(1, h * self.score_width // w))
+        return cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+
+    def _ink_map(self, thumb):
+        """1.0 where the thumbnail is well below the background (the median grey)"""
+        background = float(np.median(thumb))
+        return (thumb < background - self.ink_contrast).astype(np.float32)
+
+    def _ink_change(self, ink):
+        """Share of the ink that differs from the captured scene once aligned
+
+        About 0.1 for the same sign moved by hand shake, 1.0 or more for
+        a different one.
+        """
+        captured = self._captured_ink
+        total = max(float(ink.sum()), float(captured.sum()))
+        if total == 0:
+            return 0.0
+        (dx, dy), _ = cv2.phaseCorrelate(captured, ink)
+        h, w = ink.shape
+        shifted = cv2.warpAffine(captured, np.float32([[1, 0, dx], [0, 1, dy]]), (w, h))
+        # A light blur so a stroke one pixel off is not counted twice
+        diff = np.abs(cv2.blur(shifted, (3, 3)) - cv2.blur(ink, (3, 3)))
+        return float(diff.sum()) / total
+
+    def update(self, frame):
+        """Add a frame; returns the frame to OCR, or None"""
+        thumb = self._thumbnail(frame)
+        sharpness = cv2.Laplacian(thumb, cv2.CV_64F).var()
+
+        if self._prev is None:
+            motion = float('inf')
+        else:
+            motion = float(np.mean(cv2.absdiff(thumb, self._prev)))
+        self._prev = thumb
+        self._frames.append((frame, sharpness))
+
+        self._stable = self._stable + 1 if motion < self.motion_threshold else 0
+
+        # Wait for a new scene before triggering again
+        if self._captured_thumb is not None:
+            change = float(np.mean(cv2.absdiff(thumb, self._captured_thumb)))
+            if (change < self.rearm_threshold
+                    and self._ink_change(self._ink_map(thumb)) < self.rearm_ink_change):
+                return None
+            self._captured_thumb = None
+            self._captured_ink = None
+
+        if self._stable < self.stable_frames:
+            return None
+
+        recent = list(self._frames)[-self.stable_frames:]
+        best_frame, best_sharpness = max(recent, key=lambda item: item[1])
+        if best_sharpness < self.min_sharpness:
+            return None
+
+        self._captured_thumb = thumb
+        self._captured_ink = self._ink_map(thumb)
+        self._stable = 0
+        self.triggers += 1
+        return best_frame
@@ -0,0 +1,188 @@
+"""Headless benchmark for the text extraction pipeline.
+
+Runs every fixture image through the same stages as a capture (crop,
+preprocess_image, each Tesseract config, filter_text,
+filter_english_words). It needs no camera, window or speech. Latency
+percentiles, throughput and peak memory are written as JSON. Peak memory
+is taken from a separate untimed pass, so tracing does not slow the
+timed ones.
+
+Usage:
+    python benchmark.py fixtures/ --output results.json
+    python benchmark.py fixtures/ --save-baseline baseline.json
+    python benchmark.py fixtures/ --baseline baseline.json --tolerance 0.2
+
+With --baseline, the exit status is 1 if any stage's p50 or p95 is
+slower than the baseline by more than the tolerance.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+import main as pipeline
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff')
+
+def load_fixtures(folder):
+    """(name, image) for every readable image in folder"""
+    fixtures = []
+    for name in sorted(os.listdir(folder)):
+        if name.lower().endswith(IMAGE_EXTENSIONS):
+            img = cv2.imread(os.path.join(folder, name))
+            if img is not None:
+                fixtures.append((name, img))
+    return fixtures
+
+def crop(frame):
+    """Same centre crop as capture_and_process"""
+    m = pipeline.CROP_MARGIN
+    h, w = frame.shape[:2]
+    return frame[int(h*m):int(h*(1-m)), int(w*m):int(w*(1-m))]
+
+def summarise(samples):
+    """Latency distribution in milliseconds"""
+    ms = np.array(samples) * 1000
+    return {
+        'count': int(ms.size),
+        'mean_ms': round(float(ms.mean()), 3),
+        'p50_ms': round(float(np.percentile(ms, 50)), 3),
+        'p95_ms': round(float(np.percentile(ms, 95)), 3),
+        'max_ms': round(float(ms.max()), 3),
+    }
+
+def run_pipeline(fixtures, timed, filter_words=True):
+    """One pass of every fixture through the capture stages"""
+    for name, img in fixtures:
+        cropped = timed('crop', crop, img)
+        processed = timed('preprocess', pipeline.preprocess_image, cropped)
+        texts = []
+        for config in pipeline.OCR_CONFIGS:
+            texts.append(timed(f'ocr {config}', pipeline.ocr_backend.image_to_string,
+                               processed, config))
+        for text in texts:
+            cleaned = timed('filter_text', pipeline.filter_text, text)
+            if filter_words:
+                timed('filter_english_words', pipeline.filter_english_words, cleaned)
+
+def measure_peak_memory(fixtures, filter_words=True):
+    """Peak traced Python memory for one pass, in bytes
+
+    Run apart from the timed passes: tracemalloc hooks every allocation
+    and would inflate the latencies several times over.
+    """
+    tracemalloc.start()
+    try:
+        run_pipeline(fixtures, lambda stage, fn, *args: fn(*args), filter_words)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+def run_benchmark(fixtures, repeat=1):
+    stages = {}
+
+    def timed(stage, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        stages.setdefault(stage, []).append(time.perf_counter() - start)
+        return result
+
+    # Debug JPEGs would add disk writes to preprocess and skew the timings
+    pipeline.debug_writer.enabled = False
+
+    # A missing dictionary skips the word filter stage instead of failing the run
+    try:
+        word_filter = pipeline.get_word_filter('en').backend.name
+    except Exception as e:
+        print(f"Word filter unavailable, skipping filter_english_words: {e}", file=sys.stderr)
+        word_filter = None
+
+    # Warm-up pass so engine start-up is not counted
+    if fixtures:
+        pipeline.preprocess_image(crop(fixtures[0][1]))
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        run_pipeline(fixtures, timed, word_filter is not None)
+    elapsed = time.perf_counter() - start
+    peak = measure_peak_memory(fixtures, word_filter is not None)
+
+    images = len(fixtures) * repeat
+    results = {
+        'backend': pipeline.ocr_backend.name,
+        'word_filter': word_filter,
+        'images': images,
+        'total_s': round(elapsed, 3),
+        'throughput_images_per_s': round(images / elapsed, 3) if elapsed else 0.0,
+        'peak_python_memory_mb': round(peak / 2**20, 2),
+        'stages': {stage: summarise(samples) for stage, samples in stages.items()},
+    }
+    if resource is not None:
+        # ru_maxrss is KiB on Linux
+        results['peak_rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2)
+    return results
+
+def compare(results, baseline, tolerance):
+    """List of regressions against a saved baseline"""
+    regressions = []
+    for stage, stats in results['stages'].items():
+        base = baseline.get('stages', {}).get(stage)
+        if not base:
+            continue
+        for key in ('p50_ms', 'p95_ms'):
+            if base[key] > 0 and stats[key] > base[key] * (1 + tolerance):
+                regressions.append(f"{stage} {key}: {stats[key]:.1f} ms "
+                                   f"(baseline {base[key]:.1f} ms)")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the OCR pipeline on fixture images")
+    parser.add_argument('fixtures', help="folder of fixture images")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help="write results JSON here (default: stdout)")
+    parser.add_argument('--baseline', help="compare against this results JSON")
+    parser.add_argument('--save-baseline', help="save results as a new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="allowed slowdown before failing (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures)
+    if not fixtures:
+        print(f"No fixture images in {args.fixtures}")
+        return 2
+
+    results = run_benchmark(fixtures, args.repeat)
+    report = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report)
+    else:
+        print(report)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            f.write(report)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print("REGRESSION:", line)
+        if regressions:
+            return 1
+        print("No regressions against baseline")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""Producer/consumer capture pipeline.
+
+The preview loop only calls submit(); OCR runs on worker threads. A new
+capture cancels any job that is still waiting, running or being read
+out, and the cooldown is applied by delaying the next job instead of
+rejecting it.
+"""
+import queue
+import threading
+import time
+
+class CaptureJob:
+    """A frame waiting to be OCR'd"""
+
+    def __init__(self, job_id, frame):
+        self.job_id = job_id
+        self.frame = frame
+        self.submitted = time.time()
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._cancel_callbacks = []
+
+    def cancel(self):
+        with self._lock:
+            if self._cancelled.is_set():
+                return
+            self._cancelled.set()
+            callbacks, self._cancel_callbacks = self._cancel_callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Cancelling job {self.job_id}: {e}")
+
+    def on_cancel(self, callback):
+        """Run callback when the job is cancelled (or now, if it already was)"""
+        with self._lock:
+            if not self._cancelled.is_set():
+                self._cancel_callbacks.append(callback)
+                return
+        callback()
+
+    def is_cancelled(self):
+        return self._cancelled.is_set()
+
+    def wait_cancelled(self, timeout):
+        """Sleep up to timeout seconds; True if cancelled meanwhile"""
+        return self._cancelled.wait(timeout)
+
+class CooldownPolicy:
+    """Minimum spacing between the start of two jobs"""
+
+    def __init__(self, period):
+        self.period = period
+        self._last_start = None
+        self._lock = threading.Lock()
+
+    def delay(self):
+        """Seconds until the next job may start"""
+        with self._lock:
+            if self._last_start is None:
+                return 0
+            return max(0, self._last_start + self.period - time.time())
+
+    def mark_started(self):
+        with self._lock:
+            self._last_start = time.time()
+
+class CapturePipeline:
+    """Bounded frame queue feeding OCR worker threads"""
+
+    def __init__(self, process_fn, workers=1, max_pending=2, cooldown=0):
+        self.process_fn = process_fn
+        self.policy = CooldownPolicy(cooldown)
+        self._jobs = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._live = set()
+        self._last = None          # newest job, cancelled even after it finished
+        self._next_id = 0
+        self._threads = [
+            threading.Thread(target=self._worker, name=f'capture-{i}', daemon=True)
+            for i in range(workers)
+        ]
+        for t in self._threads:
+            t.start()
+
+    @property
+    def busy(self):
+        with self._lock:
+            return bool(self._live)
+
+    def _cancel_outstanding(self):
+        for job in self._live:
+            job.cancel()
+        # The newest job may be done with OCR but still being read out
+        if self._last is not None:
+            self._last.cancel()
+
+    def submit(self, frame):
+        """Queue a frame, cancelling anything older"""
+        with self._lock:
+            self._cancel_outstanding()
+            self._next_id += 1
+            job = CaptureJob(self._next_id, frame)
+            self._live = {job}
+            self._last = job
+
+        while True:
+            try:
+                self._jobs.put_nowait(job)
+                return job
+            except queue.Full:
+                # Make room by discarding the oldest (already cancelled) job
+                try:
+                    self._jobs.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def _worker(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            try:
+                delay = self.policy.delay()
+                if delay > 0 and job.wait_cancelled(delay):
+                    continue
+                if job.is_cancelled():
+                    continue
+                self.policy.mark_started()
+                self.process_fn(job)
+            except Exception as e:
+                print(f"Capture job {job.job_id} failed: {e}")
+            finally:
+                with self._lock:
+                    self._live.discard(job)
+
+    def stop(self):
+        """Cancel outstanding work and stop the workers"""
+        with self._lock:
+            self._cancel_outstanding()
+        for _ in self._threads:
+            self._jobs.put(None)
+        for t in self._threads:
+            t.join(timeout=1)
@@ -0,0 +1,97 @@
+"""Background writer for debug images.
+
+submit() only queues a reference to the image. JPEG encoding and the
+disk write happen on a worker thread, so callers must not modify an
+image after submitting it. The newest files for each artifact name are
+kept, with timestamped filenames. When the queue is full, new artifacts
+are dropped and counted instead of blocking the caller.
+"""
+import os
+import queue
+import threading
+import time
+
+import cv2
+
+class DebugArtifactWriter:
+    """Bounded, non-blocking JPEG writer with a per-name ring of files"""
+
+    def __init__(self, folder='debug', keep=10, max_pending=4, enabled=True, quality=90):
+        self.folder = folder
+        self.keep = keep
+        self.enabled = enabled
+        self.quality = quality
+        self.written = 0
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._rings = {}  # name -> list of paths, oldest first
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def stats(self):
+        return {'written': self.written, 'dropped': self.dropped,
+                'pending': self._queue.qsize()}
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                os.makedirs(self.folder, exist_ok=True)
+                self._thread = threading.Thread(target=self._run, name='debug-writer',
+                                                daemon=True)
+                self._thread.start()
+
+    def submit(self, name, image):
+        """Queue an image for writing; never blocks"""
+        if not self.enabled:
+            return False
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((time.time(), name, image))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _ring(self, name):
+        if name not in self._rings:
+            suffix = f'_{name}.jpg'
+            self._rings[name] = sorted(
+                os.path.join(self.folder, f) for f in os.listdir(self.folder)
+                if f.endswith(suffix))
+        return self._rings[name]
+
+    def _write(self, timestamp, name, image):
+        ok, encoded = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            return
+        ring = self._ring(name)
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(timestamp))
+        millis = int((timestamp % 1) * 1000)
+        path = os.path.join(self.folder, f'{stamp}-{millis:03d}_{name}.jpg')
+        with open(path, 'wb') as f:
+            f.write(encoded.tobytes())
+        self.written += 1
+
+        ring.append(path)
+        while len(ring) > self.keep:
+            try:
+                os.remove(ring.pop(0))
+            except OSError:
+                pass
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            try:
+                self._write(*item)
+            except Exception as e:
+                print(f"Debug artifact write failed: {e}")
+
+    def stop(self):
+        """Write what is queued, then stop the worker"""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout=5)
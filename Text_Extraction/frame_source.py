@@ -0,0 +1,207 @@
+"""Frame sources for the capture loop.
+
+A live camera, a video file, or a folder of images all provide read()
+-> (ok, frame). LatestFrameGrabber reads a source on a background thread
+and keeps only the newest frame, so a slow consumer never sees a backlog.
+Frames are handed over by reference. OpenCV allocates a new array for
+every read, so consumers may keep a frame without copying it. A camera
+that stops delivering (USB re-enumeration, a slow start) is reopened a
+few times with backoff before the grabber gives up.
+"""
+import os
+import sys
+import threading
+import time
+
+import cv2
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff')
+
+# DirectShow exists only on Windows, where the USB camera comes after the
+# built-in one. On the Pi the USB camera is /dev/video0 under V4L2.
+if sys.platform == 'win32':
+    CAMERA_INDEX = 1
+    CAMERA_API = cv2.CAP_DSHOW
+elif sys.platform.startswith('linux'):
+    CAMERA_INDEX = 0
+    CAMERA_API = cv2.CAP_V4L2
+else:
+    CAMERA_INDEX = 0
+    CAMERA_API = cv2.CAP_ANY
+
+CAMERA_APIS = {'any': cv2.CAP_ANY, 'dshow': cv2.CAP_DSHOW, 'v4l2': cv2.CAP_V4L2}
+
+# Failed camera reads in a row before giving up; the camera is reopened
+# after each, waiting READ_RETRY_BACKOFF seconds, doubling every time
+READ_RETRIES = 4
+READ_RETRY_BACKOFF = 0.5
+
+class CameraSource:
+    """Live camera"""
+
+    def __init__(self, index=CAMERA_INDEX, api=CAMERA_API, width=1280, height=720, fps=30):
+        self.index = index
+        self.api = api
+        self.settings = (width, height, fps)
+        self.open()
+
+    def open(self):
+        width, height, fps = self.settings
+        self.cap = cv2.VideoCapture(self.index, self.api)
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        self.cap.set(cv2.CAP_PROP_AUTOFOCUS, 1)
+        self.cap.set(cv2.CAP_PROP_FPS, fps)
+        # Keep the driver from queueing stale frames where supported
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+    def read(self):
+        return self.cap.read()
+
+    def reopen(self):
+        self.cap.release()
+        self.open()
+
+    def release(self):
+        self.cap.release()
+
+class VideoFileSource:
+    """Recorded video, paced at its own frame rate"""
+
+    def __init__(self, path, loop=False, realtime=True):
+        self.path = path
+        self.loop = loop
+        self.cap = cv2.VideoCapture(path)
+        fps = self.cap.get(cv2.CAP_PROP_FPS) or 30
+        self.interval = 1.0 / fps if realtime else 0
+        self._next = time.time()
+
+    def read(self):
+        delay = self._next - time.time()
+        if delay > 0:
+            time.sleep(delay)
+        self._next = max(self._next, time.time()) + self.interval
+        ok, frame = self.cap.read()
+        if not ok and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = self.cap.read()
+        return ok, frame
+
+    def release(self):
+        self.cap.release()
+
+class ImageDirSource:
+    """Folder of still images, each held on screen for a while"""
+
+    def __init__(self, folder, fps=10, hold=1.5, loop=False):
+        self.paths = [os.path.join(folder, name) for name in sorted(os.listdir(folder))
+                      if name.lower().endswith(IMAGE_EXTENSIONS)]
+        self.interval = 1.0 / fps
+        self.repeats = max(1, int(hold * fps))
+        self.loop = loop
+        self._index = 0
+        self._shown = 0
+        self._image = None
+
+    def read(self):
+        if self._index >= len(self.paths):
+            if not self.loop or not self.paths:
+                return False, None
+            self._index = 0
+        if self._image is None:
+            self._image = cv2.imread(self.paths[self._index])
+        time.sleep(self.interval)
+        # A fresh array per frame, like a camera would return
+        frame = self._image.copy()
+        self._shown += 1
+        if self._shown >= self.repeats:
+            self._index += 1
+            self._shown = 0
+            self._image = None
+        return True, frame
+
+    def release(self):
+        pass
+
+def open_source(spec, api=None):
+    """Camera index, video file or image folder from a command-line value
+
+    api is a key of CAMERA_APIS; None uses the platform default.
+    """
+    if spec is None or str(spec).isdigit():
+        return CameraSource(int(spec) if spec is not None else CAMERA_INDEX,
+                            CAMERA_APIS[api] if api else CAMERA_API)
+    if os.path.isdir(spec):
+        return ImageDirSource(spec)
+    return VideoFileSource(spec)
+
+class LatestFrameGrabber:
+    """Background reader that keeps only the newest frame"""
+
+    def __init__(self, source, retries=READ_RETRIES, backoff=READ_RETRY_BACKOFF):
+        self.source = source
+        # Only a live camera is worth reopening; a file that ends is finished
+        self.retries = retries if hasattr(source, 'reopen') else 0
+        self.backoff = backoff
+        self.finished = False
+        self.frames_read = 0
+        self.frames_skipped = 0
+        self.reopens = 0
+        self._frame = None
+        self._frame_id = 0
+        self._consumed_id = 0
+        self._running = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name='frame-grabber', daemon=True)
+
+    def start(self):
+        self._running = True
+        self._thread.start()
+        return self
+
+    def _run(self):
+        failures = 0
+        while self._running:
+            ok, frame = self.source.read()
+            if not ok and failures < self.retries:
+                delay = self.backoff * 2 ** failures
+                failures += 1
+                print(f"Camera read failed, reopening in {delay:.1f} s "
+                      f"({failures}/{self.retries})")
+                time.sleep(delay)
+                if not self._running:
+                    break
+                self.source.reopen()
+                self.reopens += 1
+                continue
+            with self._cond:
+                if not ok:
+                    self.finished = True
+                    self._cond.notify_all()
+                    break
+                failures = 0
+                if self._frame_id > self._consumed_id:
+                    self.frames_skipped += 1
+                self._frame = frame
+                self._frame_id += 1
+                self.frames_read += 1
+                self._cond.notify_all()
+
+    def read(self, last_id=0, timeout=2.0):
+        """Wait for a frame newer than last_id; returns (frame_id, frame)"""
+        deadline = time.time() + timeout
+        with self._cond:
+            while self._frame_id <= last_id and not self.finished:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return last_id, None
+                self._cond.wait(remaining)
+            if self._frame_id <= last_id:
+                return last_id, None
+            self._consumed_id = self._frame_id
+            return self._frame_id, self._frame
+
+    def stop(self):
+        self._running = False
+        self._thread.join(timeout=2)
+        self.source.release()
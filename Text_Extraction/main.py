@@ -2,37 +2,119 @@ import cv2
 import pytesseract
 import numpy as np
 import time
-import pyttsx3
-from threading import Thread
-import enchant
 import re
+import os
+import sys
+import argparse
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Shared modules (metrics) live one level up
+ROOT_DIR = os.path.dirname(APP_DIR)
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+import metrics
+from ocr_backend import get_backend
+from capture_pipeline import CapturePipeline
+from frame_source import open_source, LatestFrameGrabber, CameraSource, CAMERA_APIS
+from text_regions import (localise_text, find_text_regions, split_into_bands,
+                          merge_band_texts)
+from auto_capture import AutoCapture
+from debug_artifacts import DebugArtifactWriter
+from ocr_cache import OcrCache, image_key
+from word_filter import get_word_filter
+from adaptive_ocr import ConfigSelector, scene_type, confidence_score, is_confident
+from prompt_bank import PromptBank, prompt_text, live_player, TTS_DIR
+from speech import SpeechService, PRIORITY_URGENT, PRIORITY_PROMPT, PRIORITY_READOUT
 
 # Path to Tesseract
 pytesseract.pytesseract.tesseract_cmd = r"C:\Users\Emmanuel Quartey\AppData\Local\Programs\Tesseract-OCR\tesseract.exe"
 
-# Text-to-speech engine
-engine = pyttsx3.init()
-engine.setProperty('rate', 150)
+# Text-to-speech (one worker owns the pyttsx3 engine, started on first use)
+speech = SpeechService(rate=150)
+
+# Language of system prompts ('en', 'fr', 'ha' or 'sw'); pre-rendered clips
+# come from prompts/ (see prompt_bank.py), live synthesis covers the rest
+LANGUAGE = 'en'
+prompt_bank = PromptBank.load()
 
-# Camera setup
-cap = cv2.VideoCapture(1, cv2.CAP_DSHOW)
-cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
-cap.set(cv2.CAP_PROP_AUTOFOCUS, 1)
-cap.set(cv2.CAP_PROP_FPS, 30)
+# Language OCR readouts are spoken in. Anything but 'en' goes through the
+# sentence-pipelined online TTS (TTS_local_lang/pipelined_tts.py)
+READOUT_LANGUAGE = 'en'
+_readout_speaker = None
 
-# Window setup
-cv2.namedWindow('Text Capture', cv2.WINDOW_NORMAL)
-cv2.resizeWindow('Text Capture', 800, 600)
+# Capture scheduling
+cooldown_period = 3  # minimum seconds between the start of two OCR runs
+CAPTURE_WORKERS = 1
+CAPTURE_QUEUE_SIZE = 2
 
-# Global variables
-last_capture_time = 0
-cooldown_period = 3  # seconds
-processing = False
+# Auto-capture: OCR the sharpest frame once the scene holds still (toggle with A)
+AUTO_CAPTURE = False
+AUTO_STABLE_FRAMES = 6
+
+# Frame waits (FRAME_TIMEOUT s each) without a frame before the session
+# ends with a camera error. Long enough for the grabber to reopen the
+# camera; the heartbeat is sent after every wait.
+FRAME_TIMEOUT = 2.0
+CAMERA_STALL_RETRIES = 6
 
 # Crop margin (90% center area)
 CROP_MARGIN = 0.05  # 5% margin on all sides
 
+# Tesseract configurations, in order of preference
+OCR_CONFIGS = [
+    r'--psm 6 --oem 3 -l eng',
+    r'--psm 4 --oem 3 -l eng',
+    r'--psm 11 --oem 3 -l eng',
+    r'--psm 6 --oem 1 -l eng'
+]
+
+# How the configs are run:
+#   'sequential' - every config in turn, longest result wins
+#   'parallel'   - configs on a worker pool, stop early on a good result
+#   'adaptive'   - learned best config first, others only on low confidence
+#   'tiled'      - one config over horizontal bands of the page, in parallel
+OCR_MODE = 'adaptive'
+OCR_WORKERS = os.cpu_count() or 1
+OCR_PARALLEL_PASSES = min(2, OCR_WORKERS)  # parallel mode: passes running at once
+OCR_QUALITY_MIN_WORDS = 4  # a result with this many words ends the search
+OCR_MIN_CONFIDENCE = 70    # adaptive mode: confidence score that ends the search
+TILE_DENSE_PAGES = True    # adaptive mode: use tiled OCR for dense pages
+TILE_MIN_REGIONS = 12      # text blocks on the crop before it counts as a page
+TILED_OCR_CONFIG = OCR_CONFIGS[0]
+
+# Streaming readout: speak each text block as soon as it is recognised.
+# The first words come sooner, but every block is read with
+# STREAM_OCR_CONFIG alone, so OCR_MODE and its quality checks are skipped.
+STREAM_READOUT = False
+STREAM_OCR_CONFIG = OCR_CONFIGS[0]
+
+# Only OCR detected text blocks (falls back to the full crop if none found)
+USE_TEXT_REGIONS = True
+
+# Cache of recent OCR results (set OCR_CACHE_FILE to None to keep it in memory only)
+OCR_CACHE_FILE = os.path.join(APP_DIR, 'ocr_cache.json')
+ocr_cache = OcrCache(max_bytes=1024 * 1024, persist_path=OCR_CACHE_FILE)
+
+# Debug images (written in the background; set False on production devices)
+DEBUG_ARTIFACTS = True
+debug_writer = DebugArtifactWriter(folder=os.path.join(APP_DIR, 'debug'), keep=10,
+                                   enabled=DEBUG_ARTIFACTS)
+
+ocr_pool = ThreadPoolExecutor(max_workers=OCR_WORKERS, thread_name_prefix='ocr')
+
+config_selector = ConfigSelector(OCR_CONFIGS, threshold=OCR_MIN_CONFIDENCE)
+
+# Warm in-process Tesseract engines (falls back to pytesseract)
+ocr_backend = get_backend(OCR_CONFIGS, max_engines_per_key=OCR_WORKERS)
+
+def setup_window():
+    """Window setup"""
+    cv2.namedWindow('Text Capture', cv2.WINDOW_NORMAL)
+    cv2.resizeWindow('Text Capture', 800, 600)
+
 def draw_crop_guidelines(frame):
     """Draw visual guidelines showing the crop area"""
     h, w = frame.shape[:2]
@@ -51,6 +133,7 @@ def draw_crop_guidelines(frame):
     
     return frame
 
+@metrics.timed('text_filter')
 def filter_text(text):
     """Basic cleanup of OCR output"""
     if not text:
@@ -64,14 +147,31 @@ def filter_text(text):
     
     return text
 
-def speak(text):
-    """Threaded text-to-speech"""
+def readout_speaker():
+    """Shared PipelinedSpeaker for local-language readouts, created on first use"""
+    global _readout_speaker
+    if _readout_speaker is None:
+        if TTS_DIR not in sys.path:
+            sys.path.append(TTS_DIR)
+        from pipelined_tts import PipelinedSpeaker
+        _readout_speaker = PipelinedSpeaker()
+    return _readout_speaker
+
+def speak(text, priority=PRIORITY_READOUT, on_start=None, tag=None, dedupe=True):
+    """Queue text on the speech service"""
     print("\nSpeaking:", text)
-    def _speak():
-        engine.say(text)
-        engine.runAndWait()
-    Thread(target=_speak).start()
+    play = None
+    if priority == PRIORITY_READOUT and READOUT_LANGUAGE != 'en':
+        play = lambda: readout_speaker().speak(text, READOUT_LANGUAGE)
+    speech.say(text, priority, on_start, play=play, tag=tag, dedupe=dedupe)
+
+def cancel_readout(job):
+    """Drop a cancelled job's queued lines and stop its pipelined readout"""
+    speech.cancel(job.job_id)
+    if _readout_speaker is not None and speech.playing_tag == job.job_id:
+        _readout_speaker.cancel()
 
+@metrics.timed('ocr_preprocess')
 def preprocess_image(img):
     """Image preprocessing for OCR"""
     gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
@@ -86,100 +186,434 @@ def preprocess_image(img):
     thresh = cv2.medianBlur(thresh, 3)
 
     # Save debug image
-    cv2.imwrite('debug_preprocessed.jpg', thresh)
+    debug_writer.submit('preprocessed', thresh)
 
     return thresh
 
-def extract_text(img):
-    """OCR text extraction"""
-    processed_img = preprocess_image(img)
-    
-    configs = [
-        r'--psm 6 --oem 3 -l eng',
-        r'--psm 4 --oem 3 -l eng',
-        r'--psm 11 --oem 3 -l eng',
-        r'--psm 6 --oem 1 -l eng'
-    ]
-    
-    best_text = ""
-    for config in configs:
+def run_ocr_config(processed_img, config):
+    """Run a single Tesseract pass and time it"""
+    start = time.perf_counter()
+    with metrics.span('ocr_config', config=config):
+        text = ocr_backend.image_to_string(processed_img, config)
+    return filter_text(text), time.perf_counter() - start
+
+def extract_text_sequential(processed_img):
+    """Run every config in turn and keep the longest result"""
+    best_text, best_config, timings = "", None, {}
+    for config in OCR_CONFIGS:
         try:
-            text = pytesseract.image_to_string(processed_img, config=config)
-            text = filter_text(text)
+            text, elapsed = run_ocr_config(processed_img, config)
+            timings[config] = elapsed
             if len(text.split()) > len(best_text.split()):
-                best_text = text
+                best_text, best_config = text, config
         except Exception as e:
             print(f"OCR Error with config {config}: {e}")
-    
-    return best_text.strip()
+    return best_text, best_config, timings
 
-def filter_english_words(sentence):
-    d = enchant.Dict("en_US")
-    words = re.findall(r"\b\w+\b", sentence)
-    filtered = [
-        word for word in words
-        if d.check(word) and (len(word) > 1 or word.lower() in ['a', 'i'])
-    ]
-    return " ".join(filtered)
-
-def capture_and_process(frame):
-    global processing, last_capture_time
-    
-    if processing:
-        return
-    
-    current_time = time.time()
-    if current_time - last_capture_time < cooldown_period:
-        speak("Please wait before capturing again")
+def extract_text_parallel(processed_img):
+    """Run the configs concurrently, stopping once one clears the quality bar
+
+    Only OCR_PARALLEL_PASSES passes run at a time and the next config is
+    submitted when one finishes, so an early exit skips the remaining
+    passes instead of leaving them to compete with the next capture.
+    """
+    remaining = list(OCR_CONFIGS)
+    futures = {}
+    best_text, best_config, timings = "", None, {}
+
+    def submit_next():
+        config = remaining.pop(0)
+        future = ocr_pool.submit(run_ocr_config, processed_img, config)
+        futures[future] = config
+        return future
+
+    pending = set()
+    while remaining and len(pending) < OCR_PARALLEL_PASSES:
+        pending.add(submit_next())
+
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            config = futures[future]
+            try:
+                text, elapsed = future.result()
+            except Exception as e:
+                print(f"OCR Error with config {config}: {e}")
+                continue
+            timings[config] = elapsed
+            if len(text.split()) > len(best_text.split()):
+                best_text, best_config = text, config
+
+        if len(best_text.split()) >= OCR_QUALITY_MIN_WORDS:
+            # Good enough: configs not yet submitted never run, and a pass
+            # still running finishes in the background and is ignored
+            break
+        while remaining and len(pending) < OCR_PARALLEL_PASSES:
+            pending.add(submit_next())
+
+    return best_text, best_config, timings
+
+def extract_text_adaptive(processed_img, scene):
+    """Try configs in learned order until one is confident enough
+
+    scene is the scene type of the full crop (processed_img may be
+    packed text regions).
+    """
+    best_text, best_config, best_score, timings = "", None, -1.0, {}
+    best_confidences = []
+
+    for config in config_selector.order(scene):
+        try:
+            start = time.perf_counter()
+            with metrics.span('ocr_config', config=config):
+                text, confidences = ocr_backend.image_to_data(processed_img, config)
+            timings[config] = time.perf_counter() - start
+        except Exception as e:
+            print(f"OCR Error with config {config}: {e}")
+            continue
+        score = confidence_score(confidences)
+        if score > best_score:
+            best_text, best_config, best_score = filter_text(text), config, score
+            best_confidences = confidences
+        if is_confident(best_confidences, config_selector.threshold):
+            break
+
+    config_selector.record(scene, best_config, len(timings))
+    print(f"Scene '{scene}': confidence {max(best_score, 0):.0f}, "
+          f"{len(timings)} pass(es), average {config_selector.average_passes():.2f}")
+    return best_text, best_config, timings
+
+def extract_text_tiled(processed_img):
+    """OCR overlapping horizontal bands in parallel and merge them"""
+    bands = split_into_bands(processed_img, OCR_WORKERS)
+    start = time.perf_counter()
+    futures = [ocr_pool.submit(ocr_backend.image_to_string,
+                               processed_img[y0:y1], TILED_OCR_CONFIG)
+               for y0, y1 in bands]
+    texts = []
+    for future, (y0, y1) in zip(futures, bands):
+        try:
+            texts.append(future.result())
+        except Exception as e:
+            print(f"OCR Error on band {y0}-{y1}: {e}")
+            texts.append("")
+    elapsed = time.perf_counter() - start
+    metrics.observe('ocr_config', elapsed, config=TILED_OCR_CONFIG)
+    print(f"Tiled OCR: {len(bands)} band(s)")
+    return filter_text(merge_band_texts(texts)), TILED_OCR_CONFIG, {TILED_OCR_CONFIG: elapsed}
+
+def print_ocr_report(best_config, timings):
+    """Show which config won and how long each pass took"""
+    for config in OCR_CONFIGS:
+        if config in timings:
+            mark = "*" if config == best_config else " "
+            print(f" {mark} {config}: {timings[config]*1000:.0f} ms")
+        else:
+            print(f"   {config}: skipped")
+
+def is_dense_page(binary, scene, boxes):
+    """A full page of text: inked, many text blocks, tall enough for several bands
+
+    Signs and labels, even bold ones that fill the crop, have only a few
+    blocks and are read with the adaptive configs instead.
+    """
+    return (scene != 'sparse' and len(boxes) >= TILE_MIN_REGIONS
+            and len(split_into_bands(binary, OCR_WORKERS)) > 1)
+
+def extract_text(img):
+    """OCR text extraction"""
+    processed_img = preprocess_image(img)
+
+    cache_key = image_key(processed_img)
+    cached = ocr_cache.get(cache_key)
+    if cached is not None:
+        metrics.count('ocr_cache_hits')
+        print("OCR cache hit")
+        return cached
+
+    # Classified before packing: packed regions always look dense
+    scene = scene_type(processed_img)
+    boxes = find_text_regions(processed_img) if USE_TEXT_REGIONS or TILE_DENSE_PAGES else []
+
+    mode = OCR_MODE
+    if mode == 'adaptive' and TILE_DENSE_PAGES and is_dense_page(processed_img, scene, boxes):
+        # Bands are cut at the page's own whitespace rows, so the full crop is tiled
+        mode = 'tiled'
+    elif USE_TEXT_REGIONS:
+        regions_img = localise_text(processed_img, boxes)
+        if regions_img is not None:
+            processed_img = regions_img
+
+    if mode == 'tiled':
+        best_text, best_config, timings = extract_text_tiled(processed_img)
+    elif mode == 'adaptive':
+        best_text, best_config, timings = extract_text_adaptive(processed_img, scene)
+    elif mode == 'parallel':
+        best_text, best_config, timings = extract_text_parallel(processed_img)
+    else:
+        best_text, best_config, timings = extract_text_sequential(processed_img)
+
+    print_ocr_report(best_config, timings)
+    best_text = best_text.strip()
+    if best_text:
+        ocr_cache.put(cache_key, best_text)
+    return best_text
+
+def speak_prompt(prompt_id, priority=PRIORITY_PROMPT, on_start=None):
+    """Play a fixed system prompt from the bank, or synthesise it live"""
+    text = prompt_text(prompt_id, LANGUAGE)
+    play = prompt_bank.player(prompt_id, LANGUAGE) if prompt_bank else None
+    if play is None and LANGUAGE != 'en':
+        play = live_player(prompt_id, LANGUAGE)
+    print("\nSpeaking:", text)
+    speech.say(text, priority, on_start=on_start, play=play)
+
+def iter_text_lines(img):
+    """Yield OCR text block by block in reading order, as soon as each is ready"""
+    processed_img = preprocess_image(img)
+
+    cache_key = image_key(processed_img)
+    cached = ocr_cache.get(cache_key)
+    if cached is not None:
+        metrics.count('ocr_cache_hits')
+        print("OCR cache hit")
+        yield cached
         return
-    
-    processing = True
-    
+
+    # Text blocks, or horizontal bands when no blocks are found
+    boxes = find_text_regions(processed_img)
+    if boxes:
+        pieces = [processed_img[y:y+h, x:x+w] for x, y, w, h in boxes]
+    else:
+        pieces = [processed_img[y0:y1] for y0, y1 in split_into_bands(processed_img, OCR_WORKERS)]
+
+    # All pieces are queued on the pool; results are taken in order
+    futures = [ocr_pool.submit(ocr_backend.image_to_string, piece, STREAM_OCR_CONFIG)
+               for piece in pieces]
+    lines = []
+    try:
+        for future in futures:
+            try:
+                text = filter_text(future.result()).strip()
+            except Exception as e:
+                print(f"OCR Error with config {STREAM_OCR_CONFIG}: {e}")
+                continue
+            if text:
+                lines.append(text)
+                yield text
+    finally:
+        for future in futures:
+            future.cancel()
+
+    # Only reached when the caller read every block
+    if lines:
+        ocr_cache.put(cache_key, " ".join(lines))
+
+def read_streaming(job, cropped):
+    """Speak each block as it arrives and report time-to-first-word"""
+    first_word = []
+
+    def on_first_start():
+        if not first_word:
+            first_word.append(time.time())
+            metrics.observe('first_word', first_word[0] - job.submitted)
+            print(f"Time to first word: {first_word[0] - job.submitted:.2f} s")
+
+    spoken = 0
+    for text in iter_text_lines(cropped):
+        if job.is_cancelled():
+            return
+        # Lines of one page may repeat, so only the job tag groups them
+        speak(text, PRIORITY_READOUT, on_first_start, tag=job.job_id, dedupe=False)
+        spoken += 1
+
+    if not spoken and not job.is_cancelled():
+        speak_prompt('no_text')
+
+@metrics.timed('word_filter')
+def filter_english_words(sentence):
+    """Keep only English dictionary words"""
+    return get_word_filter('en').filter(sentence)
+
+@metrics.timed('capture')
+def capture_and_process(job):
+    """OCR a queued capture job and read the result aloud"""
+    frame = job.frame
+
     # Crop center area (90%)
     h, w = frame.shape[:2]
     cropped = frame[int(h*CROP_MARGIN):int(h*(1-CROP_MARGIN)), 
                     int(w*CROP_MARGIN):int(w*(1-CROP_MARGIN))]
+    debug_writer.submit('capture', cropped)
+
+    # A newer capture silences whatever this one still has queued
+    job.on_cancel(lambda: cancel_readout(job))
+
+    if STREAM_READOUT:
+        read_streaming(job, cropped)
+        return
     
     raw_text = extract_text(cropped)
+
+    # A newer capture replaced this one while OCR was running
+    if job.is_cancelled():
+        return
     
     if raw_text:
         print("\n" + "="*40)
         #print("RAW TEXT:\n", raw_text)print("\n\nFiltered TEXT:\n", filter_english_words(raw_text))
         print("="*40)
-        speak(raw_text)
+        # A re-capture of the same page cancels the old readout, so the
+        # identical new one must not be dropped as a duplicate of it
+        speak(raw_text, tag=job.job_id, dedupe=False)
     else:
-        speak("No readable text detected.")
-    
-    cv2.imwrite('last_capture.jpg', cropped)
-    processing = False
-    last_capture_time = current_time
+        speak_prompt('no_text')
 
-def main():
-    speak("Text capture ready. Press space to capture text within the green guide.")
-    
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            speak("Camera error occurred")
-            break
-        
-        frame_with_guides = draw_crop_guidelines(frame.copy())
-        cv2.imshow('Text Capture', frame_with_guides)
-        
-        key = cv2.waitKey(1)
-        if key == 32:  # Space
-            capture_and_process(frame)
-        elif key == ord('q'):
-            speak("Exiting application")
-            break
-        elif key == ord('h'):
-            help_msg = "Help: Center text in green area, SPACE to capture, Q to quit"
-            print(help_msg)
-            speak(help_msg)
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Read text aloud from a camera")
+    parser.add_argument('--source',
+                        help="camera index, video file or folder of images "
+                             "(default: the platform's usual camera index)")
+    parser.add_argument('--camera-api', choices=sorted(CAMERA_APIS),
+                        help="OpenCV capture backend (default: dshow on Windows, v4l2 on Linux)")
+    parser.add_argument('--headless', action='store_true',
+                        help="no preview window; auto-capture is always on")
+    return parser.parse_args(argv)
+
+def warm_up():
+    """Load the OCR engines, wordlist and speech engine before the first capture
+
+    A step that fails is reported and skipped; that engine then starts on
+    first use instead.
+    """
+    def step(name, fn, *args):
+        try:
+            return fn(*args)
+        except Exception as e:
+            print(f"Warm-up of {name} failed: {e}")
+
+    # The speech engine initialises on its own thread while OCR warms up here
+    step('speech', speech.warm_up, 0)
+    blank = np.full((32, 32), 255, dtype=np.uint8)
+    for config in OCR_CONFIGS:
+        step(f'OCR {config!r}', ocr_backend.image_to_string, blank, config)
+    step('word filter', get_word_filter, LANGUAGE)
+    if step('speech', speech.warm_up) is False:
+        print("Speech engine not ready yet; the first prompt may be late")
+
+def is_idle():
+    """No capture being read and nothing being spoken"""
+    return not (active_pipeline and active_pipeline.busy) and speech.idle
+
+def shutdown():
+    """Release the engines shared by every session"""
+    # Passes still running must finish before their engines are freed
+    ocr_pool.shutdown(wait=True, cancel_futures=True)
+    ocr_backend.close()
+    print("OCR cache:", ocr_cache.stats())
+    print("Debug artifacts:", debug_writer.stats())
+    debug_writer.stop()
+    ocr_cache.save()
+    print("Speech stats:", speech.stats())
+    speech.stop()
+    if _readout_speaker is not None:
+        _readout_speaker.close()
+
+active_pipeline = None
+
+def main(argv=None, stop=None, heartbeat=None, on_ready=None, keep_warm=False):
+    """Run one capture session
+
+    stop (an Event) ends the session, heartbeat is called once per frame
+    and on_ready when the ready prompt starts playing. With keep_warm the
+    OCR and speech engines stay up for the next session. Returns why the
+    session ended: 'quit', 'stopped', 'finished' or 'camera_error'.
+    """
+    global active_pipeline
+    args = parse_args(argv)
+    grabber = LatestFrameGrabber(open_source(args.source, args.camera_api)).start()
+    headless = args.headless
+    if not headless:
+        setup_window()
+    speak_prompt('ready', on_start=on_ready)
+
+    pipeline = active_pipeline = CapturePipeline(capture_and_process,
+                                                 workers=CAPTURE_WORKERS,
+                                                 max_pending=CAPTURE_QUEUE_SIZE,
+                                                 cooldown=cooldown_period)
+    auto_capture = AutoCapture(stable_frames=AUTO_STABLE_FRAMES)
+    auto_mode = AUTO_CAPTURE or headless
+    frame_id = 0
+    stalls = 0
+    reason = 'stopped'
     
-    cap.release()
-    cv2.destroyAllWindows()
-    engine.stop()
+    try:
+        while stop is None or not stop.is_set():
+            frame_id, frame = grabber.read(frame_id, FRAME_TIMEOUT)
+            if frame is None:
+                if grabber.finished and not isinstance(grabber.source, CameraSource):
+                    # End of a replayed video or image folder: let OCR finish
+                    while pipeline.busy:
+                        time.sleep(0.1)
+                    reason = 'finished'
+                elif not grabber.finished and stalls < CAMERA_STALL_RETRIES:
+                    # Auto-exposure at start-up or a USB hiccup; the grabber retries too
+                    stalls += 1
+                    print(f"No frame from the camera, waiting ({stalls}/{CAMERA_STALL_RETRIES})")
+                    if heartbeat is not None:
+                        heartbeat()
+                    continue
+                else:
+                    speak_prompt('camera_error', PRIORITY_URGENT)
+                    reason = 'camera_error'
+                break
+            stalls = 0
+            if heartbeat is not None:
+                heartbeat()
+
+            if auto_mode:
+                best_frame = auto_capture.update(frame)
+                if best_frame is not None:
+                    pipeline.submit(best_frame)
+
+            if headless:
+                continue
+
+            frame_with_guides = draw_crop_guidelines(frame.copy())
+            if pipeline.busy:
+                cv2.putText(frame_with_guides, "Reading...", (20, 40),
+                            cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+            cv2.imshow('Text Capture', frame_with_guides)
+
+            key = cv2.waitKey(1)
+            if key == 32:  # Space
+                pipeline.submit(frame)
+            elif key == ord('q'):
+                speak_prompt('exiting', PRIORITY_URGENT)
+                reason = 'quit'
+                break
+            elif key == ord('h'):
+                speak_prompt('help', PRIORITY_URGENT)
+            elif key == ord('a'):
+                auto_mode = not auto_mode
+                auto_capture.reset()
+                speak_prompt('auto_on' if auto_mode else 'auto_off', PRIORITY_URGENT)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # Also runs after a crash so the camera is free for a restart
+        pipeline.stop()
+        active_pipeline = None
+        grabber.stop()
+        if not headless:
+            cv2.destroyAllWindows()
+        print(f"Frames read: {grabber.frames_read}, skipped: {grabber.frames_skipped}, "
+              f"camera reopened: {grabber.reopens}")
+        print("Auto captures:", auto_capture.triggers)
+        if not keep_warm:
+            shutdown()
+    return reason
 
 if __name__ == "__main__":
+    metrics.enable_from_env()
     main()
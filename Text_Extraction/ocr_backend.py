@@ -0,0 +1,167 @@
+"""OCR backends used by the text extraction pipeline.
+
+TesserocrBackend keeps warm, in-process Tesseract engines (a small pool
+per language/oem pair) and hands them NumPy buffers directly.
+PytesseractBackend is the original path: one tesseract process per call,
+with the image round-tripped through a temp file. It is kept as a fallback
+for machines without tesserocr.
+"""
+import re
+import threading
+import queue
+
+import numpy as np
+import pytesseract
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+# Folder holding *.traineddata (None lets tesserocr use TESSDATA_PREFIX)
+TESSDATA_PATH = None
+
+def parse_config(config):
+    """Split a tesseract config string into (psm, oem, lang)"""
+    psm = re.search(r'--psm\s+(\d+)', config)
+    oem = re.search(r'--oem\s+(\d+)', config)
+    lang = re.search(r'-l\s+(\S+)', config)
+    return (int(psm.group(1)) if psm else 3,
+            int(oem.group(1)) if oem else 3,
+            lang.group(1) if lang else 'eng')
+
+class PytesseractBackend:
+    """Subprocess-per-call backend (fallback)"""
+    name = 'pytesseract'
+
+    def image_to_string(self, img, config):
+        return pytesseract.image_to_string(img, config=config)
+
+    def image_to_data(self, img, config):
+        """Text plus per-word confidences (0-100)"""
+        data = pytesseract.image_to_data(img, config=config,
+                                         output_type=pytesseract.Output.DICT)
+        lines, confidences = {}, []
+        for i, word in enumerate(data['text']):
+            conf = float(data['conf'][i])
+            if conf < 0 or not word.strip():
+                continue
+            line = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+            lines.setdefault(line, []).append(word)
+            confidences.append(conf)
+        text = "\n".join(" ".join(words) for words in lines.values())
+        return text, confidences
+
+    def warm_up(self, configs):
+        pass
+
+    def close(self):
+        pass
+
+class TesserocrBackend:
+    """In-process backend with long-lived engines per language/oem pair"""
+    name = 'tesserocr'
+
+    def __init__(self, tessdata_path=TESSDATA_PATH, max_engines_per_key=1):
+        if tesserocr is None:
+            raise RuntimeError("tesserocr is not installed")
+        self.tessdata_path = tessdata_path
+        self.max_engines_per_key = max(1, max_engines_per_key)
+        self._lock = threading.Lock()
+        self._idle = {}      # (lang, oem) -> LifoQueue of idle engines
+        self._created = {}   # (lang, oem) -> number of engines created
+        self._engines = []
+
+    def _new_engine(self, lang, oem):
+        kwargs = {'lang': lang, 'oem': oem}
+        if self.tessdata_path:
+            kwargs['path'] = self.tessdata_path
+        api = tesserocr.PyTessBaseAPI(**kwargs)
+        self._engines.append(api)
+        return api
+
+    def _acquire(self, key):
+        with self._lock:
+            idle = self._idle.setdefault(key, queue.LifoQueue())
+            try:
+                return idle.get_nowait()
+            except queue.Empty:
+                pass
+            if self._created.get(key, 0) < self.max_engines_per_key:
+                self._created[key] = self._created.get(key, 0) + 1
+                create = True
+            else:
+                create = False
+        if create:
+            try:
+                return self._new_engine(*key)
+            except Exception:
+                with self._lock:
+                    self._created[key] -= 1
+                raise
+        # Every engine for this pair is busy: wait for one to come back
+        return idle.get()
+
+    def _release(self, key, api):
+        self._idle[key].put(api)
+
+    def _set_image(self, api, img):
+        img = np.ascontiguousarray(img)
+        height, width = img.shape[:2]
+        channels = 1 if img.ndim == 2 else img.shape[2]
+        api.SetImageBytes(img.tobytes(), width, height, channels,
+                          width * channels)
+
+    def image_to_string(self, img, config):
+        psm, oem, lang = parse_config(config)
+        key = (lang, oem)
+        api = self._acquire(key)
+        try:
+            api.SetPageSegMode(psm)
+            self._set_image(api, img)
+            return api.GetUTF8Text()
+        finally:
+            api.Clear()
+            self._release(key, api)
+
+    def image_to_data(self, img, config):
+        """Text plus per-word confidences (0-100)"""
+        psm, oem, lang = parse_config(config)
+        key = (lang, oem)
+        api = self._acquire(key)
+        try:
+            api.SetPageSegMode(psm)
+            self._set_image(api, img)
+            text = api.GetUTF8Text()
+            return text, [float(c) for c in api.AllWordConfidences()]
+        finally:
+            api.Clear()
+            self._release(key, api)
+
+    def warm_up(self, configs):
+        """Load the traineddata for every language/oem pair up front"""
+        keys = set()
+        for config in configs:
+            _, oem, lang = parse_config(config)
+            keys.add((lang, oem))
+        for key in keys:
+            self._release(key, self._acquire(key))
+
+    def close(self):
+        with self._lock:
+            for api in self._engines:
+                api.End()
+            self._engines = []
+            self._idle = {}
+            self._created = {}
+
+def get_backend(configs=(), max_engines_per_key=1):
+    """Return a warm in-process backend, or the pytesseract fallback"""
+    if tesserocr is not None:
+        try:
+            backend = TesserocrBackend(max_engines_per_key=max_engines_per_key)
+            backend.warm_up(configs)
+            return backend
+        except Exception as e:
+            print(f"tesserocr unavailable ({e}), falling back to pytesseract")
+    return PytesseractBackend()
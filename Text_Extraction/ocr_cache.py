@@ -0,0 +1,154 @@
+"""OCR result cache for near-identical preprocessed images.
+
+A key has two parts. The first is a 256-bit difference hash (dHash) of a
+17x16 thumbnail, which finds candidate entries within a small Hamming
+distance. The second is a 64x48 ink-density thumbnail that must confirm
+the candidate before its text is reused. The dHash of a mostly empty
+crop cannot tell different words with the same layout apart (EXIT and
+FXIT hash the same), but the thumbnails differ by a fifth of their ink.
+Sensor noise on a recapture of the same scene changes well under 1%, so
+those still hit. A camera that has moved is a miss, and the page is read
+again.
+
+Entries are evicted least-recently-used once the byte budget is
+exceeded, and the cache can be saved to a JSON file so it survives
+restarts.
+"""
+import base64
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict, namedtuple
+
+import cv2
+import numpy as np
+
+HASH_WIDTH = 16
+HASH_HEIGHT = 16
+THUMB_SIZE = (64, 48)  # (width, height) of the ink thumbnail
+ENTRY_OVERHEAD = 96    # rough bytes per entry besides the text and thumbnail
+
+ImageKey = namedtuple('ImageKey', 'dhash thumb')
+
+def image_key(img):
+    """Perceptual hash and ink thumbnail of a binarised image (black ink on white)"""
+    small = cv2.resize(img, (HASH_WIDTH + 1, HASH_HEIGHT), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    ink = (img == 0).astype(np.float32)
+    thumb = cv2.resize(ink, THUMB_SIZE, interpolation=cv2.INTER_AREA)
+    return ImageKey(value, np.round(thumb * 255).astype(np.uint8))
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+def ink_change(a, b):
+    """Share of the ink that differs between two thumbnails"""
+    a = a.astype(np.int32)
+    b = b.astype(np.int32)
+    total = max(int(a.sum()), int(b.sum()))
+    if total == 0:
+        return 0.0
+    return float(np.abs(a - b).sum()) / total
+
+class OcrCache:
+    """LRU cache of OCR text with verified near-duplicate matching"""
+
+    def __init__(self, max_bytes=256 * 1024, max_distance=12, max_ink_change=0.02,
+                 persist_path=None):
+        self.max_bytes = max_bytes
+        self.max_distance = max_distance
+        self.max_ink_change = max_ink_change
+        self.persist_path = persist_path
+        self._entries = OrderedDict()  # dhash -> (thumb, text), oldest first
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0  # hash matches the thumbnail check turned down
+        self.evictions = 0
+        if persist_path:
+            self.load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return {
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'rejected': self.rejected,
+            'evictions': self.evictions,
+        }
+
+    @staticmethod
+    def _size(thumb, text):
+        return len(text.encode('utf-8')) + thumb.nbytes + ENTRY_OVERHEAD
+
+    def get(self, key):
+        """Text for the closest entry whose thumbnail confirms the match, or None"""
+        with self._lock:
+            candidates = sorted((hamming(key.dhash, other), other) for other in self._entries)
+            for distance, other in candidates:
+                if distance > self.max_distance:
+                    break
+                thumb, text = self._entries[other]
+                if ink_change(key.thumb, thumb) <= self.max_ink_change:
+                    self._entries.move_to_end(other)
+                    self.hits += 1
+                    return text
+                self.rejected += 1
+            self.misses += 1
+            return None
+
+    def put(self, key, text):
+        with self._lock:
+            if key.dhash in self._entries:
+                self._bytes -= self._size(*self._entries.pop(key.dhash))
+            self._entries[key.dhash] = (key.thumb, text)
+            self._bytes += self._size(key.thumb, text)
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, old = self._entries.popitem(last=False)
+                self._bytes -= self._size(*old)
+                self.evictions += 1
+
+    def load(self):
+        """Read entries saved by save(), if the file exists"""
+        try:
+            with open(self.persist_path, encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+        for entry in saved:
+            if len(entry) != 3:
+                continue  # saved by an older version without thumbnails
+            hex_key, thumb, text = entry
+            thumb = np.frombuffer(base64.b64decode(thumb), dtype=np.uint8)
+            if thumb.size != THUMB_SIZE[0] * THUMB_SIZE[1]:
+                continue
+            self.put(ImageKey(int(hex_key, 16), thumb.reshape(THUMB_SIZE[1], THUMB_SIZE[0])),
+                     text)
+
+    def save(self):
+        """Write entries (LRU order) to persist_path atomically"""
+        if not self.persist_path:
+            return
+        with self._lock:
+            data = [[format(k, 'x'), base64.b64encode(thumb.tobytes()).decode('ascii'), t]
+                    for k, (thumb, t) in self._entries.items()]
+        # Resolved so a symlinked cache file (shared between releases) stays a link
+        path = os.path.realpath(self.persist_path)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp, path)
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
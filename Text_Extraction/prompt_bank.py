@@ -0,0 +1,203 @@
+"""Pre-rendered system prompts in every supported language.
+
+Build step (run once after changing PROMPTS, needs pydub + ffmpeg):
+    python prompt_bank.py build
+
+English is rendered with pyttsx3, and French, Hausa and Swahili with the
+cached gTTS synthesizer in TTS_local_lang. Every clip is decoded to mono
+16-bit PCM and concatenated into prompts.pcm, with prompts.json as the
+index. At runtime the PCM file is memory-mapped and clips are played
+straight from the map. A prompt that is missing or out of date (its
+text changed since the build) returns None, and the caller falls back
+to live synthesis.
+"""
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+BANK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'prompts')
+SAMPLE_RATE = 22050
+LANGUAGES = ('en', 'fr', 'ha', 'sw')
+
+TTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                       'TTS_local_lang')
+
+PROMPTS = {
+    'ready': {
+        'en': "Text capture ready. Press space to capture text within the green guide.",
+        'fr': "Capture de texte prête. Appuyez sur espace pour capturer le texte dans le cadre vert.",
+        'ha': "An shirya ɗaukar rubutu. Danna maɓallin sarari don ɗaukar rubutun da ke cikin koren jagora.",
+        'sw': "Kunasa maandishi kuko tayari. Bonyeza kitufe cha nafasi ili kunasa maandishi ndani ya mwongozo wa kijani.",
+    },
+    'please_wait': {
+        'en': "Please wait before capturing again",
+        'fr': "Veuillez patienter avant de capturer à nouveau.",
+        'ha': "Don Allah jira kafin ka sake ɗauka.",
+        'sw': "Tafadhali subiri kabla ya kunasa tena.",
+    },
+    'no_text': {
+        'en': "No readable text detected.",
+        'fr': "Aucun texte lisible détecté.",
+        'ha': "Ba a gano rubutun da za a iya karantawa ba.",
+        'sw': "Hakuna maandishi yanayosomeka yaliyogunduliwa.",
+    },
+    'help': {
+        'en': "Help: Center text in green area, SPACE to capture, A for auto capture, Q to quit",
+        'fr': "Aide : centrez le texte dans la zone verte, ESPACE pour capturer, A pour la capture automatique, Q pour quitter.",
+        'ha': "Taimako: Sanya rubutu a tsakiyar koren wuri, SARARI don ɗauka, A don ɗauka ta atomatik, Q don fita.",
+        'sw': "Msaada: Weka maandishi katikati ya eneo la kijani, NAFASI kunasa, A kwa kunasa kiotomatiki, Q kutoka.",
+    },
+    'camera_error': {
+        'en': "Camera error occurred",
+        'fr': "Erreur de caméra.",
+        'ha': "An sami matsala da kyamara.",
+        'sw': "Hitilafu ya kamera imetokea.",
+    },
+    'exiting': {
+        'en': "Exiting application",
+        'fr': "Fermeture de l'application.",
+        'ha': "Ana rufe shirin.",
+        'sw': "Inafunga programu.",
+    },
+    'auto_on': {
+        'en': "Auto capture on",
+        'fr': "Capture automatique activée.",
+        'ha': "An kunna ɗauka ta atomatik.",
+        'sw': "Kunasa kiotomatiki kumewashwa.",
+    },
+    'auto_off': {
+        'en': "Auto capture off",
+        'fr': "Capture automatique désactivée.",
+        'ha': "An kashe ɗauka ta atomatik.",
+        'sw': "Kunasa kiotomatiki kumezimwa.",
+    },
+}
+
+def prompt_text(prompt_id, lang):
+    """Prompt text in lang, or English if there is no translation"""
+    texts = PROMPTS[prompt_id]
+    return texts.get(lang, texts['en'])
+
+def _tts_module():
+    if TTS_DIR not in sys.path:
+        sys.path.append(TTS_DIR)
+    import multilingual_tts
+    return multilingual_tts
+
+def play_samples(samples, rate=SAMPLE_RATE):
+    """Play int16 mono samples (blocks until done)"""
+    try:
+        import sounddevice
+        sounddevice.play(samples, rate)
+        sounddevice.wait()
+    except (ImportError, OSError):  # OSError: sounddevice without PortAudio
+        import simpleaudio
+        simpleaudio.play_buffer(np.ascontiguousarray(samples), 1, 2, rate).wait_done()
+
+def playback_available():
+    for module in ('sounddevice', 'simpleaudio'):
+        try:
+            __import__(module)
+            return True
+        except (ImportError, OSError):
+            pass
+    return False
+
+class PromptBank:
+    """Memory-mapped PCM clips indexed by (prompt_id, lang)"""
+
+    def __init__(self, samples, index):
+        self.samples = samples
+        self.sample_rate = index['sample_rate']
+        self.entries = index['entries']
+
+    @classmethod
+    def load(cls, folder=BANK_DIR):
+        """The bank in folder, or None if it is missing or cannot be played"""
+        pcm = os.path.join(folder, 'prompts.pcm')
+        try:
+            with open(os.path.join(folder, 'prompts.json'), encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not os.path.exists(pcm) or not os.path.getsize(pcm) or not playback_available():
+            return None
+        return cls(np.memmap(pcm, dtype=np.int16, mode='r'), index)
+
+    def get(self, prompt_id, lang):
+        """Samples for a prompt (a view into the map), or None"""
+        entry = self.entries.get(f'{lang}/{prompt_id}')
+        if not entry or prompt_id not in PROMPTS or entry['text'] != prompt_text(prompt_id, lang):
+            return None
+        return self.samples[entry['offset']:entry['offset'] + entry['length']]
+
+    def player(self, prompt_id, lang):
+        """Callable that plays the prompt, or None if not in the bank"""
+        samples = self.get(prompt_id, lang)
+        if samples is None:
+            return None
+        return lambda: play_samples(samples, self.sample_rate)
+
+def _render_english(text, path):
+    import pyttsx3
+    engine = pyttsx3.init()
+    engine.save_to_file(text, path)
+    engine.runAndWait()
+    engine.stop()
+
+def _decode(path):
+    from pydub import AudioSegment
+    audio = AudioSegment.from_file(path)
+    audio = audio.set_channels(1).set_frame_rate(SAMPLE_RATE).set_sample_width(2)
+    return np.frombuffer(audio.raw_data, dtype=np.int16)
+
+def build(folder=BANK_DIR, languages=LANGUAGES):
+    """Render every prompt in every language into folder"""
+    os.makedirs(folder, exist_ok=True)
+    entries, clips, offset = {}, [], 0
+    tmp_dir = tempfile.mkdtemp()
+
+    for lang in languages:
+        for prompt_id in PROMPTS:
+            text = prompt_text(prompt_id, lang)
+            try:
+                if lang == 'en':
+                    path = os.path.join(tmp_dir, f'{prompt_id}.wav')
+                    _render_english(text, path)
+                else:
+                    path = _tts_module().synthesize(text, lang)
+                samples = _decode(path)
+            except Exception as e:
+                print(f"Skipping {lang}/{prompt_id}: {e}")
+                continue
+            entries[f'{lang}/{prompt_id}'] = {'offset': offset, 'length': int(samples.size),
+                                              'text': text}
+            clips.append(samples)
+            offset += samples.size
+            print(f"Rendered {lang}/{prompt_id} ({samples.size / SAMPLE_RATE:.1f} s)")
+
+    pcm = os.path.join(folder, 'prompts.pcm')
+    with open(pcm + '.tmp', 'wb') as f:
+        for clip in clips:
+            f.write(clip.tobytes())
+    with open(os.path.join(folder, 'prompts.json.tmp'), 'w', encoding='utf-8') as f:
+        json.dump({'sample_rate': SAMPLE_RATE, 'entries': entries}, f,
+                  ensure_ascii=False, indent=1)
+    os.replace(pcm + '.tmp', pcm)
+    os.replace(os.path.join(folder, 'prompts.json.tmp'), os.path.join(folder, 'prompts.json'))
+    print(f"Prompt bank: {len(entries)} clips, {offset * 2 / 2**20:.1f} MB in {folder}")
+
+def live_player(prompt_id, lang):
+    """Fallback for non-English prompts missing from the bank"""
+    tts = _tts_module()
+    text = prompt_text(prompt_id, lang)
+    return lambda: tts.play(tts.synthesize(text, lang))
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == 'build':
+        build(languages=sys.argv[2:] or LANGUAGES)
+    else:
+        print(__doc__)
@@ -0,0 +1,220 @@
+"""Speech service: one worker thread owns the pyttsx3 engine.
+
+Messages go through a priority queue. An urgent message interrupts a
+long readout that is already playing. A message identical to one that is
+queued, playing, or just finished is dropped instead of being repeated,
+unless it is said with dedupe=False. Only prompts and status messages
+are deduplicated; OCR readouts are said with dedupe=False and tagged with
+their capture. Messages said with a tag can be withdrawn together with
+cancel(tag).
+"""
+import itertools
+import queue
+import threading
+import time
+
+import pyttsx3
+
+import metrics
+
+# Lower value = spoken first
+PRIORITY_URGENT = 0    # help, errors, exit
+PRIORITY_PROMPT = 1    # short status prompts
+PRIORITY_READOUT = 2   # OCR results
+
+KINDS = {PRIORITY_URGENT: 'urgent', PRIORITY_PROMPT: 'prompt', PRIORITY_READOUT: 'readout'}
+
+class SpeechService:
+    """Queue text for speech on a single engine-owning thread"""
+
+    def __init__(self, rate=150, dedupe_window=2.0, long_readout_chars=60):
+        self.rate = rate
+        self.dedupe_window = dedupe_window
+        self.long_readout_chars = long_readout_chars
+
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._queued = set()
+        self._current = None       # (priority, text, tag) being spoken
+        self._recent = {}          # text -> time it finished
+        self._interrupt = threading.Event()
+        self._engine = None
+        self._ready = threading.Event()
+
+        # Metrics
+        self.spoken = 0
+        self.duplicates_dropped = 0
+        self.interruptions = 0
+        self.last_latency = 0.0
+        self._latency_total = 0.0
+
+        self._thread = None
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='speech', daemon=True)
+                self._thread.start()
+
+    def warm_up(self, timeout=10):
+        """Start the worker and wait until its engine is initialised"""
+        self._ensure_started()
+        return self._ready.wait(timeout)
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    @property
+    def idle(self):
+        """Nothing queued or playing"""
+        return self._current is None and self._queue.empty()
+
+    @property
+    def playing_tag(self):
+        """Tag of the message being spoken, or None"""
+        current = self._current
+        return current[2] if current else None
+
+    def stats(self):
+        """Queue depth and enqueue-to-start latency"""
+        return {
+            'queue_depth': self.queue_depth,
+            'spoken': self.spoken,
+            'duplicates_dropped': self.duplicates_dropped,
+            'interruptions': self.interruptions,
+            'last_latency': self.last_latency,
+            'mean_latency': self._latency_total / self.spoken if self.spoken else 0.0,
+        }
+
+    def say(self, text, priority=PRIORITY_READOUT, on_start=None, play=None, tag=None,
+            dedupe=True):
+        """Queue text; returns False if it was dropped as a duplicate
+
+        on_start is called from the worker just before the text is spoken.
+        play, if given, is called on the worker instead of pyttsx3, for
+        pre-rendered or other-language audio. tag groups messages for
+        cancel(). With dedupe=False the text is spoken even if it repeats,
+        for readout lines where a page may say the same thing twice.
+        """
+        if not text:
+            return False
+        now = time.time()
+        with self._lock:
+            if dedupe:
+                playing = self._current and self._current[1] == text
+                recent = now - self._recent.get(text, 0) < self.dedupe_window
+                if text in self._queued or playing or recent:
+                    self.duplicates_dropped += 1
+                    metrics.count('speech_duplicates_dropped')
+                    return False
+                self._queued.add(text)
+
+            # Urgent messages cut a long readout short
+            if (self._current and priority < self._current[0]
+                    and len(self._current[1]) >= self.long_readout_chars):
+                self._interrupt.set()
+
+        self._ensure_started()
+        self._queue.put((priority, next(self._seq), now, text, on_start, play, tag, dedupe))
+        return True
+
+    def cancel(self, tag):
+        """Drop queued messages with this tag and cut short the one playing
+
+        Returns how many queued messages were dropped.
+        """
+        dropped = 0
+        with self._lock:
+            kept = []
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item[3] is not None and item[6] == tag:
+                    dropped += 1
+                    if item[7]:
+                        self._queued.discard(item[3])
+                else:
+                    kept.append(item)
+            for item in kept:
+                self._queue.put(item)
+            if self._current and self._current[2] == tag:
+                self._interrupt.set()
+        if dropped:
+            metrics.count('speech_cancelled', dropped)
+        return dropped
+
+    def _on_word(self, name, location, length):
+        if self._interrupt.is_set():
+            self._interrupt.clear()
+            self.interruptions += 1
+            metrics.count('speech_interruptions')
+            self._engine.stop()
+
+    def _run(self):
+        # pyttsx3 engines must be driven from the thread that created them
+        self._engine = pyttsx3.init()
+        self._engine.setProperty('rate', self.rate)
+        self._engine.connect('started-word', self._on_word)
+        self._ready.set()
+
+        while True:
+            priority, _, enqueued, text, on_start, play, tag, dedupe = self._queue.get()
+            if text is None:
+                break
+            with self._lock:
+                if dedupe:
+                    self._queued.discard(text)
+                self._current = (priority, text, tag)
+                self._interrupt.clear()
+
+            self.last_latency = time.time() - enqueued
+            self._latency_total += self.last_latency
+            self.spoken += 1
+            kind = KINDS.get(priority, 'other')
+            metrics.observe('speech_queue_wait', self.last_latency, kind=kind)
+            try:
+                if on_start is not None:
+                    on_start()
+                with metrics.span('speech', kind=kind):
+                    if play is not None:
+                        play()
+                    else:
+                        self._engine.say(text)
+                        self._engine.runAndWait()
+            except Exception as e:
+                print(f"Speech error: {e}")
+
+            with self._lock:
+                self._current = None
+                self._recent[text] = time.time()
+                if len(self._recent) > 50:
+                    cutoff = time.time() - self.dedupe_window
+                    self._recent = {t: ts for t, ts in self._recent.items() if ts > cutoff}
+
+        self._engine.stop()
+
+    def stop(self, drain=True):
+        """Stop the worker, optionally after speaking what is queued"""
+        if self._thread is None:
+            return
+        if not drain:
+            while True:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            with self._lock:
+                self._queued.clear()
+                if self._current:
+                    self._interrupt.set()
+        # Sorts after every real message at the lowest priority
+        self._queue.put((PRIORITY_READOUT + 1, next(self._seq), time.time(), None, None, None,
+                         None, False))
+        if drain:
+            self._thread.join()
+        else:
+            self._thread.join(timeout=2)
@@ -0,0 +1,158 @@
+"""Text localisation on the binarised (Otsu) image.
+
+Finds candidate text blocks with morphology and contours, then packs
+the tight crops into one image so a single OCR pass covers them all.
+For dense pages, it also splits the image into horizontal bands at
+whitespace rows and merges the per-band OCR text again.
+"""
+import re
+from difflib import SequenceMatcher
+
+import cv2
+import numpy as np
+
+# Kernel that joins characters into words/lines (fraction of image width)
+JOIN_KERNEL_WIDTH = 0.025
+JOIN_KERNEL_HEIGHT = 5
+MIN_REGION_HEIGHT = 8        # px, smaller blobs are noise
+MIN_REGION_AREA = 300        # px^2
+INK_DENSITY_RANGE = (0.05, 0.85)  # solid blobs and empty boxes are not text
+REGION_PADDING = 6           # px of white kept around each block
+BATCH_GAP = 16               # px of white between stacked blocks
+MAX_COVERAGE = 0.8           # above this, OCR the full crop instead
+
+# Band tiling
+BAND_OVERLAP = 12            # px each band extends past its cut
+BAND_MIN_HEIGHT = 80         # px, never cut bands thinner than this
+BLANK_ROW_INK = 0.002        # row counts as whitespace below this ink share
+DUPLICATE_LINE_RATIO = 0.8   # similarity above which overlap lines are merged
+
+def find_text_regions(binary):
+    """Bounding boxes (x, y, w, h) of text blocks, in reading order"""
+    h, w = binary.shape[:2]
+    ink = cv2.bitwise_not(binary)  # text becomes white on black
+
+    kw = max(3, int(w * JOIN_KERNEL_WIDTH))
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (kw, JOIN_KERNEL_HEIGHT))
+    joined = cv2.morphologyEx(ink, cv2.MORPH_CLOSE, kernel)
+
+    contours, _ = cv2.findContours(joined, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    boxes = []
+    for contour in contours:
+        x, y, bw, bh = cv2.boundingRect(contour)
+        if bh < MIN_REGION_HEIGHT or bw * bh < MIN_REGION_AREA:
+            continue
+        # Ignore frame borders and page edges that touch the crop boundary
+        if bw >= w - 2 or bh >= h - 2:
+            continue
+        density = np.count_nonzero(ink[y:y+bh, x:x+bw]) / float(bw * bh)
+        if not INK_DENSITY_RANGE[0] <= density <= INK_DENSITY_RANGE[1]:
+            continue
+        boxes.append((x, y, bw, bh))
+
+    padded = []
+    for x, y, bw, bh in reading_order(boxes):
+        x0 = max(0, x - REGION_PADDING)
+        y0 = max(0, y - REGION_PADDING)
+        x1 = min(w, x + bw + REGION_PADDING)
+        y1 = min(h, y + bh + REGION_PADDING)
+        padded.append((x0, y0, x1 - x0, y1 - y0))
+    return padded
+
+def reading_order(boxes):
+    """Sort unpadded boxes top to bottom by line, left to right within a line
+
+    A box joins a line when it overlaps the line's vertical extent by at
+    least half of the smaller height, so lines are found from the boxes
+    themselves rather than from fixed y buckets.
+    """
+    lines = []  # [top, bottom, boxes]
+    for box in sorted(boxes, key=lambda b: b[1] + b[3] / 2):
+        x, y, bw, bh = box
+        for line in lines:
+            overlap = min(line[1], y + bh) - max(line[0], y)
+            if overlap >= min(bh, line[1] - line[0]) / 2:
+                line[0], line[1] = min(line[0], y), max(line[1], y + bh)
+                line[2].append(box)
+                break
+        else:
+            lines.append([y, y + bh, [box]])
+    lines.sort(key=lambda line: line[0])
+    return [box for line in lines for box in sorted(line[2], key=lambda b: b[0])]
+
+def batch_regions(binary, boxes):
+    """Stack the cropped blocks vertically on a white canvas"""
+    width = max(b[2] for b in boxes)
+    height = sum(b[3] for b in boxes) + BATCH_GAP * (len(boxes) + 1)
+    canvas = np.full((height, width + 2 * BATCH_GAP), 255, dtype=binary.dtype)
+
+    y = BATCH_GAP
+    for x0, y0, bw, bh in boxes:
+        canvas[y:y+bh, BATCH_GAP:BATCH_GAP+bw] = binary[y0:y0+bh, x0:x0+bw]
+        y += bh + BATCH_GAP
+    return canvas
+
+def localise_text(binary, boxes=None):
+    """Packed text blocks, or None when the full crop should be used
+
+    boxes from an earlier find_text_regions(binary) call are reused.
+    """
+    if boxes is None:
+        boxes = find_text_regions(binary)
+    if not boxes:
+        return None
+    covered = sum(b[2] * b[3] for b in boxes)
+    if covered > MAX_COVERAGE * binary.shape[0] * binary.shape[1]:
+        return None
+    return batch_regions(binary, boxes)
+
+def split_into_bands(binary, bands):
+    """(y0, y1) row ranges of overlapping horizontal bands, top to bottom"""
+    h, w = binary.shape[:2]
+    bands = max(1, min(bands, h // BAND_MIN_HEIGHT))
+    if bands == 1:
+        return [(0, h)]
+
+    # Row projection: count ink pixels on every row at once
+    ink_rows = np.count_nonzero(binary == 0, axis=1)
+    blank_rows = np.flatnonzero(ink_rows <= w * BLANK_ROW_INK)
+
+    cuts = [0]
+    for i in range(1, bands):
+        ideal = i * h // bands
+        cut = ideal
+        if blank_rows.size:
+            # Nearest whitespace row to the ideal cut, within half a band
+            pos = np.searchsorted(blank_rows, ideal)
+            near = blank_rows[max(0, pos - 1):pos + 1]
+            best = int(near[np.argmin(np.abs(near - ideal))])
+            if abs(best - ideal) <= h // (2 * bands):
+                cut = best
+        if cut - cuts[-1] >= BAND_MIN_HEIGHT:
+            cuts.append(cut)
+    cuts.append(h)
+
+    return [(max(0, y0 - BAND_OVERLAP), min(h, y1 + BAND_OVERLAP))
+            for y0, y1 in zip(cuts[:-1], cuts[1:])]
+
+def _normalise_line(line):
+    return re.sub(r'[^a-z0-9]', '', line.lower())
+
+def _same_line(a, b):
+    a, b = _normalise_line(a), _normalise_line(b)
+    if not a or not b:
+        return False
+    return a == b or SequenceMatcher(None, a, b).ratio() >= DUPLICATE_LINE_RATIO
+
+def merge_band_texts(texts, lookback=2):
+    """Join band OCR results in order, dropping lines repeated at overlaps"""
+    merged = []
+    for text in texts:
+        lines = [line for line in text.splitlines() if line.strip()]
+        tail = merged[-lookback:]
+        # Skip leading lines that already ended the previous band
+        while lines and any(_same_line(lines[0], prev) for prev in tail):
+            lines.pop(0)
+        merged.extend(lines)
+    return "\n".join(merged)
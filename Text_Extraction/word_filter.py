@@ -0,0 +1,113 @@
+"""Dictionary filtering of OCR output.
+
+Each language's wordlist is loaded once into a frozenset, and lookups
+are memoised. Wordlists are plain text files with one word per line.
+They are searched for in wordlists/<lang>.txt next to this file, then in
+the system dictionaries. If no list is found, pyenchant is used when it
+is installed. With neither, the filter passes words through unchecked
+and logs a warning, so readout still works (unfiltered) instead of
+failing.
+"""
+import logging
+import os
+import re
+from functools import lru_cache
+
+try:
+    import enchant
+except ImportError:
+    enchant = None
+
+WORDLIST_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'wordlists')
+
+# Where to look for each language's wordlist, in order
+WORDLIST_PATHS = {
+    'en': [os.path.join(WORDLIST_DIR, 'en.txt'),
+           '/usr/share/dict/american-english', '/usr/share/dict/words'],
+    'fr': [os.path.join(WORDLIST_DIR, 'fr.txt'), '/usr/share/dict/french'],
+    'ha': [os.path.join(WORDLIST_DIR, 'ha.txt')],
+    'sw': [os.path.join(WORDLIST_DIR, 'sw.txt')],
+}
+
+# pyenchant dictionary tags for the optional backend
+ENCHANT_TAGS = {'en': 'en_US', 'fr': 'fr_FR', 'ha': 'ha', 'sw': 'sw'}
+
+# Single-letter words that are real words in each language
+SHORT_WORDS = {
+    'en': {'a', 'i'},
+    'fr': {'a', 'à', 'y', 'ô'},
+    'ha': {'a', 'i'},
+    'sw': {'a', 'u', 'i'},
+}
+
+WORD_RE = re.compile(r"\b\w+\b")
+
+class WordlistBackend:
+    name = 'wordlist'
+
+    def __init__(self, path):
+        with open(path, encoding='utf-8', errors='ignore') as f:
+            self.words = frozenset(line.strip().lower() for line in f if line.strip())
+
+    def check(self, word):
+        return word.lower() in self.words
+
+class EnchantBackend:
+    name = 'enchant'
+
+    def __init__(self, tag):
+        if enchant is None:
+            raise RuntimeError("pyenchant is not installed")
+        self.dictionary = enchant.Dict(tag)
+
+    def check(self, word):
+        return self.dictionary.check(word)
+
+class PassThroughBackend:
+    """Accepts every word; used when a language has no dictionary"""
+    name = 'none'
+
+    def check(self, word):
+        return True
+
+class WordFilter:
+    """Keep only dictionary words from OCR text"""
+
+    def __init__(self, lang, backend, cache_size=8192):
+        self.lang = lang
+        self.backend = backend
+        self.short_words = SHORT_WORDS.get(lang, set())
+        self.is_word = lru_cache(maxsize=cache_size)(self._is_word)
+
+    def _is_word(self, word):
+        if len(word) == 1:
+            return word.lower() in self.short_words
+        if word.isdigit():
+            return False
+        return self.backend.check(word)
+
+    def filter(self, text):
+        """Dictionary words from a whole OCR output, in order"""
+        return " ".join(w for w in WORD_RE.findall(text) if self.is_word(w))
+
+    def filter_many(self, texts):
+        return [self.filter(text) for text in texts]
+
+_filters = {}
+
+def load_backend(lang):
+    """Wordlist backend if a list exists, otherwise pyenchant, otherwise pass-through"""
+    for path in WORDLIST_PATHS.get(lang, []):
+        if os.path.isfile(path):
+            return WordlistBackend(path)
+    try:
+        return EnchantBackend(ENCHANT_TAGS.get(lang, lang))
+    except Exception as e:
+        logging.warning(f"No dictionary for '{lang}' ({e}); words will not be filtered")
+        return PassThroughBackend()
+
+def get_word_filter(lang='en'):
+    """Shared WordFilter for a language, built on first use"""
+    if lang not in _filters:
+        _filters[lang] = WordFilter(lang, load_backend(lang))
+    return _filters[lang]
@@ -2,12 +2,19 @@ import os
 import sys
 import subprocess
 import shutil
+import threading
 from pathlib import Path
 
+import metrics
+from release_manager import ReleaseManager
+
 # Configuration
-REPO_URL = "https://github.com/QuEB128/STEWARD_V.A"
+REPO_URL = os.environ.get('STEWARD_UPDATE_REMOTE', "https://github.com/QuEB128/STEWARD_V.A")
 DEFAULT_REPO_NAME = "STEWARD_V.A"
 UPDATE_SCRIPT = "auto_update.py"
+BRANCH = "main"
+CHECK_INTERVAL = 6 * 60 * 60  # seconds between background update checks
+GIT_TIMEOUT = 30
 
 def get_script_dir():
     """Get the directory where this script is located"""
@@ -57,59 +64,149 @@ def ensure_repository():
     print("⚠️ Continuing in standalone mode without update capabilities")
     return script_dir
 
+def git(repo_path, *args, timeout=GIT_TIMEOUT):
+    """Run a git command in repo_path and return its stripped stdout"""
+    return subprocess.run(['git', '-C', str(repo_path), *args], check=True, timeout=timeout,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE).stdout.decode('utf-8').strip()
+
+def remote_head(repo_path, branch=BRANCH):
+    """Commit at the tip of origin/<branch>, using one ls-remote round trip"""
+    try:
+        output = git(repo_path, 'ls-remote', 'origin', f'refs/heads/{branch}')
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
+        return None
+    return output.split()[0] if output else None
+
+def is_shallow(repo_path):
+    try:
+        return git(repo_path, 'rev-parse', '--is-shallow-repository') == 'true'
+    except subprocess.CalledProcessError:
+        return False
+
 def check_for_updates(repo_path):
     """Check for and apply updates"""
     try:
         print("🔍 Checking for updates...")
         
-        # Change to repository directory
-        os.chdir(str(repo_path))
-        
-        # Fetch updates
-        subprocess.run(['git', 'fetch', 'origin'], check=True)
-        
-        # Compare versions
-        current_hash = subprocess.check_output(['git', 'rev-parse', 'HEAD']).decode('utf-8').strip()
-        latest_hash = subprocess.check_output(['git', 'rev-parse', 'origin/main']).decode('utf-8').strip()
+        # Compare versions without fetching anything
+        current_hash = git(repo_path, 'rev-parse', 'HEAD')
+        latest_hash = remote_head(repo_path)
+        if latest_hash is None:
+            print("⚠️ Update server unreachable, skipping")
+            return False
 
         print(f"🔄 Current version: {current_hash[:7]}")
         print(f"🆕 Latest version: {latest_hash[:7]}")
 
-        if current_hash != latest_hash:
-            print("📥 Update available! Pulling changes...")
-            try:
-                subprocess.run(['git', 'pull', 'origin', 'main'], check=True)
-                print("✅ Update complete.")
-                return True
-            except subprocess.CalledProcessError:
-                print("⚠️ Merge required. Attempting automatic resolution...")
-                subprocess.run(['git', 'merge', '--no-edit', 'origin/main'], check=True)
-                print("✅ Merge completed.")
-                return True
-        else:
+        if current_hash == latest_hash:
             print("✅ Already up to date!")
             return False
 
+        # Fetch only the branch tip we need
+        print("📥 Update available! Fetching changes...")
+        shallow = is_shallow(repo_path)
+        fetch = ['fetch', '--no-tags', 'origin', BRANCH]
+        if shallow:
+            fetch[1:1] = ['--depth=1']
+        git(repo_path, *fetch, timeout=300)
+
+        if shallow:
+            # Shallow clones have no shared history to merge with
+            git(repo_path, 'reset', '--keep', 'FETCH_HEAD')
+            print("✅ Update complete.")
+            return True
+        try:
+            git(repo_path, 'merge', '--ff-only', 'FETCH_HEAD')
+            print("✅ Update complete.")
+            return True
+        except subprocess.CalledProcessError:
+            print("⚠️ Merge required. Attempting automatic resolution...")
+            git(repo_path, 'merge', '--no-edit', 'FETCH_HEAD')
+            print("✅ Merge completed.")
+            return True
+
     except Exception as e:
         print(f"❌ Update check failed: {str(e)}")
         return False
 
+def release_base():
+    """Releases base directory if this copy runs from an A/B slot, else None"""
+    script_dir = Path(os.path.realpath(get_script_dir()))
+    if script_dir.parent.name == 'releases':
+        return script_dir.parent.parent
+    return None
+
 def restart_application():
     """Restart the application after update"""
     python = sys.executable
-    os.execl(python, python, *sys.argv)
+    argv = list(sys.argv)
+    base = release_base()
+    if base is not None and argv and os.path.exists(argv[0]):
+        # Re-enter through the `current` link so the new slot is picked up
+        script = Path(os.path.abspath(argv[0]))
+        try:
+            argv[0] = str(base / 'current' / Path(os.path.realpath(script)).relative_to(
+                os.path.realpath(get_script_dir())))
+        except ValueError:
+            pass
+    os.execl(python, python, *argv)
+
+class UpdateService:
+    """Checks for updates in the background and restarts once the assistant is idle"""
+
+    def __init__(self, interval=CHECK_INTERVAL, idle_check=None, on_restart=None):
+        self.interval = interval          # None: check once
+        self.idle_check = idle_check or (lambda: True)
+        self.on_restart = on_restart or restart_application
+        self.update_pending = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='auto-update', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+
+    def is_alive(self):
+        return self._thread.is_alive()
+
+    def _run(self):
+        base = release_base()
+        if base is not None:
+            # Slot install: stage the release next to this one, never touch the live tree
+            manager = ReleaseManager(base, REPO_URL, BRANCH)
+            check = manager.update
+        else:
+            repo_path = ensure_repository()
+            if not is_git_repo(repo_path):
+                return
+            check = lambda: check_for_updates(repo_path)
+        while not self._stop.is_set():
+            with metrics.span('update_check') as span:
+                updated = check()
+                span.set(result='updated' if updated else 'current')
+            if updated:
+                self.update_pending = True
+                print("🔄 Update installed, restarting when idle...")
+                # Never restart in the middle of a readout
+                while not self._stop.is_set():
+                    if self.idle_check():
+                        self.on_restart()
+                        return
+                    self._stop.wait(1)
+            if self.interval is None or self._stop.wait(self.interval):
+                return
 
 def main():
     print("\n===== STEWARD V.A Starting =====")
     
-    # Ensure we have the repository
-    repo_path = ensure_repository()
-    
-    # Check for updates if in a git repo
-    if is_git_repo(repo_path):
-        if check_for_updates(repo_path):
-            print("🔄 Restarting to apply updates...")
-            restart_application()
+    # Check for updates in the background; the application starts right away
+    service = UpdateService(interval=None).start()
     
     # Your normal application code here
     print("\nRunning main application...")
@@ -117,5 +214,7 @@ def main():
     print("\n===== STEWARD V.A Running =====")
     print("\n✨ New feature added in v1.1!")
 
+    service.join()
+
 if __name__ == "__main__":
     main()
@@ -5,21 +5,23 @@ import logging
 import re
 from pathlib import Path
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('/var/log/bt_auto_connect.log'),
-        logging.StreamHandler()
-    ]
-)
+import metrics
+from bluetooth_session import BluetoothctlSession
+
+LOG_FILE = '/var/log/bt_auto_connect.log'
 
 class BluetoothAutoConnector:
-    def __init__(self, device_mac, device_name=None, check_interval=30):
+    def __init__(self, device_mac, device_name=None, check_interval=30, session=None,
+                 pair_timeout=20, connect_timeout=15):
         self.device_mac = device_mac.upper()  # Normalize MAC address
         self.device_name = device_name
         self.check_interval = check_interval
+        # Per-step limits; steps finish as soon as bluetoothctl reports the result
+        self.pair_timeout = pair_timeout
+        self.connect_timeout = connect_timeout
+        self.disconnected_since = None
+        # One long-lived bluetoothctl process for every check and action
+        self.session = session or BluetoothctlSession()
         
     def is_bluetooth_available(self):
         """Check if Bluetooth service is available and running"""
@@ -35,7 +37,13 @@ class BluetoothAutoConnector:
         try:
             subprocess.run(['sudo', 'systemctl', 'start', 'bluetooth'], 
                          timeout=10, check=True)
-            time.sleep(3)
+            # Poll until the service reports active instead of a fixed wait
+            deadline = time.time() + 10
+            while not self.is_bluetooth_available():
+                if time.time() > deadline:
+                    logging.error("Bluetooth service did not become active")
+                    return False
+                time.sleep(0.2)
             logging.info("Bluetooth service started")
             return True
         except subprocess.CalledProcessError:
@@ -45,75 +53,71 @@ class BluetoothAutoConnector:
     def enable_bluetooth(self):
         """Enable Bluetooth adapter"""
         try:
-            subprocess.run(['sudo', 'bluetoothctl', 'power', 'on'], 
-                         timeout=10, check=True)
-            time.sleep(2)
-            logging.info("Bluetooth adapter enabled")
-            return True
-        except subprocess.CalledProcessError:
+            output = self.session.command('power on')
+            if any('succeeded' in line for line in output):
+                logging.info("Bluetooth adapter enabled")
+                return True
             logging.error("Failed to enable Bluetooth adapter")
             return False
+        except OSError as e:
+            logging.error(f"Failed to enable Bluetooth adapter: {e}")
+            return False
     
     def is_device_connected(self):
         """Check if the target device is currently connected"""
         try:
-            result = subprocess.run(['bluetoothctl', 'info', self.device_mac], 
-                                  capture_output=True, text=True, timeout=10)
-            
-            if "Connected: yes" in result.stdout:
-                logging.info(f"Device {self.device_mac} is connected")
-                return True
-            return False
-            
-        except (subprocess.TimeoutExpired, subprocess.CalledProcessError):
+            with metrics.span('bt_check', device=self.device_mac):
+                return self.session.info(self.device_mac).get('Connected') == 'yes'
+        except OSError:
             return False
     
     def is_device_paired(self):
         """Check if device is already paired"""
         try:
-            result = subprocess.run(['bluetoothctl', 'devices'], 
-                                  capture_output=True, text=True, timeout=10)
-            return self.device_mac in result.stdout
-        except (subprocess.TimeoutExpired, subprocess.CalledProcessError):
+            return self.device_mac in self.session.devices()
+        except OSError:
             return False
     
     def is_device_trusted(self):
         """Check if device is trusted"""
         try:
-            result = subprocess.run(['bluetoothctl', 'info', self.device_mac], 
-                                  capture_output=True, text=True, timeout=10)
-            return "Trusted: yes" in result.stdout
-        except (subprocess.TimeoutExpired, subprocess.CalledProcessError):
+            return self.session.info(self.device_mac).get('Trusted') == 'yes'
+        except OSError:
             return False
     
     def trust_device(self):
         """Trust the device"""
         try:
-            subprocess.run(['sudo', 'bluetoothctl', 'trust', self.device_mac], 
-                         timeout=10, check=True)
-            logging.info(f"Device {self.device_mac} trusted")
-            return True
-        except subprocess.CalledProcessError:
+            output = self.session.command(f'trust {self.device_mac}')
+            self.session.invalidate(self.device_mac)
+            if any('trust succeeded' in line for line in output):
+                logging.info(f"Device {self.device_mac} trusted")
+                return True
+            logging.error(f"Failed to trust device {self.device_mac}")
+            return False
+        except OSError:
             logging.error(f"Failed to trust device {self.device_mac}")
             return False
     
     def pair_device(self):
         """Pair with the device"""
         try:
-            # Start pairing process
-            process = subprocess.Popen(
-                ['sudo', 'bluetoothctl', 'pair', self.device_mac],
-                stdout=subprocess.PIPE, 
-                stderr=subprocess.PIPE,
-                text=True
-            )
+            # Start pairing
+            start = self.session.mark()
+            self.session.send(f'pair {self.device_mac}')
             
-            # Wait for pairing to complete (with timeout)
-            time.sleep(10)
-            process.terminate()
+            # Wait for bluetoothctl to report the outcome (with timeout)
+            # "Failed to pair: org.bluez.Error.AlreadyExists" means it is
+            # already paired, so that alternative must come before "Failed to pair"
+            event = self.session.wait_for(
+                r'Failed to pair: \S*AlreadyExists|Pairing successful|AlreadyExists'
+                r'|Failed to pair|not available',
+                self.pair_timeout, since=start)
+            self.session.invalidate(self.device_mac)
             
             # Check if pairing was successful
-            if self.is_device_paired():
+            if event and (event.group(0) == 'Pairing successful'
+                          or event.group(0).endswith('AlreadyExists')):
                 logging.info(f"Successfully paired with {self.device_mac}")
                 return True
             else:
@@ -127,18 +131,16 @@ class BluetoothAutoConnector:
     def connect_device(self):
         """Connect to the device"""
         try:
-            process = subprocess.Popen(
-                ['sudo', 'bluetoothctl', 'connect', self.device_mac],
-                stdout=subprocess.PIPE, 
-                stderr=subprocess.PIPE,
-                text=True
-            )
+            start = self.session.mark()
+            self.session.send(f'connect {self.device_mac}')
             
-            # Wait for connection to complete
-            time.sleep(8)
-            process.terminate()
+            # Wait for bluetoothctl to report the outcome (with timeout)
+            event = self.session.wait_for(
+                r'Connection successful|Failed to connect|not available',
+                self.connect_timeout, since=start)
+            self.session.invalidate(self.device_mac)
             
-            if self.is_device_connected():
+            if event and event.group(0) == 'Connection successful':
                 logging.info(f"Successfully connected to {self.device_mac}")
                 return True
             else:
@@ -155,24 +157,26 @@ class BluetoothAutoConnector:
             logging.info("Scanning for Bluetooth devices...")
             
             # Start scan
-            subprocess.run(['sudo', 'bluetoothctl', 'scan', 'on'], 
-                         timeout=5, check=True)
+            start = self.session.mark()
+            self.session.send('scan on')
             
-            # Wait for devices to be discovered
-            time.sleep(scan_time)
+            # Stop as soon as the target shows up ([NEW]/[CHG] Device <mac>)
+            found = self.session.wait_for(rf'Device {re.escape(self.device_mac)}\b',
+                                          scan_time, since=start)
+            if found:
+                logging.info(f"Found {self.device_mac} while scanning")
             
             # Stop scan
-            subprocess.run(['sudo', 'bluetoothctl', 'scan', 'off'], 
-                         timeout=5, check=True)
+            self.session.command('scan off')
             
             # List devices
-            result = subprocess.run(['bluetoothctl', 'devices'], 
-                                  capture_output=True, text=True, timeout=10)
+            self.session.invalidate()
+            devices = self.session.devices()
             
-            logging.info(f"Available devices:\n{result.stdout}")
-            return self.device_mac in result.stdout
+            logging.info("Available devices:\n" + "\n".join(sorted(devices)))
+            return self.device_mac in devices
             
-        except subprocess.CalledProcessError as e:
+        except OSError as e:
             logging.error(f"Scan failed: {e}")
             return False
     
@@ -210,6 +214,9 @@ class BluetoothAutoConnector:
         
         while True:
             try:
+                # Fresh device state for this cycle
+                self.session.new_cycle()
+
                 # Ensure Bluetooth is set up
                 if not self.setup_bluetooth():
                     logging.error("Bluetooth setup failed, retrying...")
@@ -219,10 +226,19 @@ class BluetoothAutoConnector:
                 # Check if device is connected
                 if not self.is_device_connected():
                     logging.warning(f"Device {self.device_mac} not connected")
+                    if self.disconnected_since is None:
+                        self.disconnected_since = time.monotonic()
                     
                     # Try to connect
-                    if self.run_connection_sequence():
-                        logging.info(f"Successfully connected to {self.device_mac}")
+                    with metrics.span('bt_connect', device=self.device_mac) as span:
+                        connected = self.run_connection_sequence()
+                        span.set(result='connected' if connected else 'failed')
+                    if connected:
+                        elapsed = time.monotonic() - self.disconnected_since
+                        self.disconnected_since = None
+                        metrics.observe('bt_reconnect', elapsed, device=self.device_mac)
+                        logging.info(f"Successfully connected to {self.device_mac} "
+                                     f"(time to reconnect: {elapsed:.1f} s)")
                     else:
                         logging.warning(f"Failed to connect to {self.device_mac}")
                         # Optional: scan for devices if connection fails repeatedly
@@ -236,38 +252,51 @@ class BluetoothAutoConnector:
                 
             except KeyboardInterrupt:
                 logging.info("Stopped by user")
+                self.session.close()
                 break
             except Exception as e:
                 logging.error(f"Unexpected error in main loop: {e}")
                 time.sleep(self.check_interval)
 
-def discover_bluetooth_devices():
-    """Helper function to discover available Bluetooth devices"""
+def discover_bluetooth_devices(session=None, target_mac=None, scan_time=15):
+    """Helper function to discover available Bluetooth devices
+
+    With target_mac the scan ends as soon as that device is seen.
+    """
+    session = session or BluetoothctlSession()
     try:
         logging.info("Discovering Bluetooth devices...")
         
         # Enable Bluetooth and start scan
-        subprocess.run(['sudo', 'bluetoothctl', 'power', 'on'], timeout=5)
-        subprocess.run(['sudo', 'bluetoothctl', 'scan', 'on'], timeout=5)
+        session.command('power on')
+        start = session.mark()
+        session.send('scan on')
         
-        logging.info("Scanning for 15 seconds...")
-        time.sleep(15)
+        logging.info(f"Scanning for up to {scan_time} seconds...")
+        if target_mac:
+            session.wait_for(rf'Device {re.escape(target_mac.upper())}\b', scan_time, since=start)
+        else:
+            time.sleep(scan_time)
         
         # Stop scan and list devices
-        subprocess.run(['sudo', 'bluetoothctl', 'scan', 'off'], timeout=5)
-        result = subprocess.run(['bluetoothctl', 'devices'], 
-                              capture_output=True, text=True, timeout=10)
+        session.command('scan off')
+        output = "\n".join(line for line in session.command('devices')
+                           if line.startswith('Device'))
         
         logging.info("Discovered devices:")
-        logging.info(result.stdout)
+        logging.info(output)
         
-        return result.stdout
+        return output
         
     except Exception as e:
         logging.error(f"Discovery failed: {e}")
         return None
 
 def main():
+    # Log records are written by a background thread, never by the monitor loop
+    metrics.setup_logging(log_file=LOG_FILE)
+    metrics.enable_from_env()
+
     # Configuration - CHANGE THESE VALUES
     DEVICE_MAC = "XX:XX:XX:XX:XX:XX"  # Replace with your device's MAC address
     # DEVICE_NAME = "Your_Device_Name"  # Optional: device name for reference
@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+"""Asyncio connection manager for several Bluetooth devices.
+
+Each device gets its own supervisor task. The supervisor runs a small
+state machine (checking, pairing, trusting, connecting, scanning,
+backoff, connected) with exponential backoff and jitter between
+failures. All devices share one bluetoothctl process and one scan at a
+time: a device that needs a scan joins the scan already running. While
+a device is connected, its supervisor waits for a "Connected: no" event
+and does not poll.
+
+The command backend is pluggable. --fake runs against
+fake_bluetoothctl.py, and --bench reports reconnect latency and CPU use:
+
+    python bluetooth_manager.py --device AA:BB:CC:DD:EE:FF=headset
+    python bluetooth_manager.py --fake --bench 30
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import statistics
+import sys
+import time
+
+import metrics
+from bluetooth_session import ANSI_RE, PROMPT_RE, VERSION_RE
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# "Paired: yes", "Battery Percentage: 0x64 (100)"
+FIELD_RE = re.compile(r'^([A-Z][A-Za-z]*(?: [A-Z][A-Za-z]*)?):\s*(.*)$')
+
+# A device seen by a scan
+SEEN_RE = re.compile(r'^\[(?:NEW|CHG)\] Device ([0-9A-F]{2}(?::[0-9A-F]{2}){5})', re.IGNORECASE)
+
+FAKE_BLUETOOTHCTL = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                 'fake_bluetoothctl.py')
+
+class AsyncBluetoothctl:
+    """One interactive bluetoothctl process driven from asyncio"""
+
+    def __init__(self, command=None, use_sudo=True):
+        self.command_line = command or (['sudo', 'bluetoothctl'] if use_sudo else ['bluetoothctl'])
+        self.process = None
+        self._lines = []
+        self._offset = 0    # stream position of self._lines[0]
+        self._changed = None
+        self._command_lock = None
+        self._action_lock = None
+        self._start_lock = None
+        self._reader = None
+        self.restarts = 0
+
+    async def start(self):
+        """Start bluetoothctl, or restart it if it has exited"""
+        if self.process is not None and self.process.returncode is None:
+            return
+        if self._changed is None:
+            # Created once: a restart must not strand waiters on old locks
+            self._changed = asyncio.Condition()
+            self._command_lock = asyncio.Lock()
+            self._action_lock = asyncio.Lock()
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self.process is not None and self.process.returncode is None:
+                return  # another task restarted it meanwhile
+            if self.process is not None:
+                self.restarts += 1
+                logging.warning(f"bluetoothctl exited ({self.process.returncode}), restarting")
+            async with self._changed:
+                # Old output is dropped, but positions keep counting up
+                self._offset += len(self._lines)
+                self._lines = []
+            self.process = await asyncio.create_subprocess_exec(
+                *self.command_line, stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT)
+            self._reader = asyncio.ensure_future(self._read(self.process))
+
+    async def _read(self, process):
+        buffer = ''
+        while True:
+            chunk = await process.stdout.read(4096)
+            if not chunk:
+                break
+            buffer += chunk.decode('utf-8', errors='replace')
+            parts = re.split(r'[\r\n]', buffer)
+            buffer = parts.pop()
+            lines = [PROMPT_RE.sub('', ANSI_RE.sub('', part)).strip() for part in parts]
+            async with self._changed:
+                self._lines.extend(line for line in lines if line)
+                if len(self._lines) > 5000:
+                    # Drop old output; positions stay valid through the offset
+                    self._offset += 4000
+                    del self._lines[:4000]
+                self._changed.notify_all()
+        async with self._changed:
+            self._changed.notify_all()
+
+    def mark(self):
+        """Position in the output stream"""
+        return self._offset + len(self._lines)
+
+    def lines_since(self, position):
+        return self._lines[max(0, position - self._offset):]
+
+    async def send(self, cmd):
+        await self.start()
+        self.process.stdin.write((cmd + '\n').encode())
+        await self.process.stdin.drain()
+
+    async def next_match(self, pattern, timeout, since=None):
+        """(match, position after the matching line); match is None on timeout"""
+        regex = re.compile(pattern) if isinstance(pattern, str) else pattern
+        position = self.mark() if since is None else since
+        deadline = time.monotonic() + timeout
+        async with self._changed:
+            while True:
+                position = max(position, self._offset)
+                while position < self.mark():
+                    match = regex.search(self._lines[position - self._offset])
+                    position += 1
+                    if match:
+                        return match, position
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self.process.returncode is not None:
+                    return None, position
+                try:
+                    await asyncio.wait_for(self._changed.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def wait_for(self, pattern, timeout, since=None):
+        """First line matching pattern after position since, or None"""
+        match, _ = await self.next_match(pattern, timeout, since)
+        return match
+
+    async def command(self, cmd, timeout=10):
+        """Run a command; returns its output lines"""
+        await self.start()
+        async with self._command_lock:
+            start = self.mark()
+            await self.send(cmd)
+            await self.send('version')
+            await self.wait_for(VERSION_RE, timeout, since=start)
+            return [line for line in self.lines_since(start) if not VERSION_RE.match(line)]
+
+    async def info(self, mac):
+        """Property fields from 'info <mac>' (empty if bluez does not know it)
+
+        Output from other devices' actions can be interleaved, so only
+        property-style lines after this device's header are used.
+        """
+        fields, in_device = {}, False
+        for line in await self.command(f'info {mac}'):
+            if line.startswith(f'Device {mac} ('):
+                in_device = True
+            elif in_device:
+                match = FIELD_RE.match(line)
+                if match:
+                    fields[match.group(1)] = match.group(2).strip()
+        return fields
+
+    async def action(self, cmd, pattern, timeout):
+        """Send a pair/connect-style command and wait for its outcome
+
+        Outcome lines such as "Connection successful" do not name the
+        device, so these actions run one at a time.
+        """
+        await self.start()
+        async with self._action_lock:
+            start = self.mark()
+            await self.send(cmd)
+            return await self.wait_for(pattern, timeout, since=start)
+
+    async def close(self):
+        if self.process is None or self.process.returncode is not None:
+            return
+        try:
+            await self.send('quit')
+            await asyncio.wait_for(self.process.wait(), 3)
+        except (OSError, asyncio.TimeoutError):
+            self.process.kill()
+            await self.process.wait()
+
+class ScanCoordinator:
+    """Runs at most one scan and lets any number of devices wait on it"""
+
+    def __init__(self, backend, scan_time=10):
+        self.backend = backend
+        self.scan_time = scan_time
+        self.scans = 0
+        self._wanted = {}   # mac -> future
+        self._task = None
+
+    async def find(self, mac):
+        """True once mac is seen by the shared scan, False if the scan ends first"""
+        future = self._wanted.get(mac)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._wanted[mac] = future
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._scan())
+        return await asyncio.shield(future)
+
+    async def _scan(self):
+        self.scans += 1
+        position = self.backend.mark()
+        await self.backend.send('scan on')
+        logging.info(f"Scanning for {', '.join(self._wanted)}")
+        deadline = time.monotonic() + self.scan_time
+        try:
+            while self._wanted:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                match, position = await self.backend.next_match(SEEN_RE, remaining, since=position)
+                if match is None:
+                    break
+                mac = match.group(1).upper()
+                future = self._wanted.pop(mac, None)
+                if future and not future.done():
+                    future.set_result(True)
+        finally:
+            # Waiters are released first, even if 'scan off' fails
+            for future in self._wanted.values():
+                if not future.done():
+                    future.set_result(False)
+            self._wanted = {}
+            await self.backend.command('scan off')
+
+CHECKING = 'checking'
+CONNECTED = 'connected'
+PAIRING = 'pairing'
+TRUSTING = 'trusting'
+CONNECTING = 'connecting'
+SCANNING = 'scanning'
+BACKOFF = 'backoff'
+
+class DeviceSupervisor:
+    """Keeps one device connected"""
+
+    def __init__(self, mac, name, backend, scanner, check_interval=30,
+                 backoff_base=1.0, backoff_max=60.0, pair_timeout=20, connect_timeout=15):
+        self.mac = mac.upper()
+        self.name = name or self.mac
+        self.backend = backend
+        self.scanner = scanner
+        self.check_interval = check_interval
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.pair_timeout = pair_timeout
+        self.connect_timeout = connect_timeout
+
+        self.state = CHECKING
+        self.failures = 0
+        self.disconnected_since = None
+        self.reconnect_times = []
+
+    def _set_state(self, state):
+        if state != self.state:
+            logging.debug(f"{self.name}: {self.state} -> {state}")
+            self.state = state
+
+    def backoff_delay(self):
+        """Exponential backoff with equal jitter"""
+        delay = min(self.backoff_max, self.backoff_base * 2 ** max(0, self.failures - 1))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    async def connect_sequence(self, info):
+        if not info:
+            # Unknown to bluez: it has to be seen in a scan before pairing
+            self._set_state(SCANNING)
+            if not await self.scanner.find(self.mac):
+                return False
+            info = await self.backend.info(self.mac)
+
+        if info.get('Paired') != 'yes':
+            self._set_state(PAIRING)
+            # "Failed to pair: org.bluez.Error.AlreadyExists" means it is
+            # already paired, so that alternative must come before "Failed to pair"
+            event = await self.backend.action(
+                f'pair {self.mac}',
+                r'Failed to pair: \S*AlreadyExists|Pairing successful|AlreadyExists'
+                rf'|Failed to pair|{re.escape(self.mac)} not available',
+                self.pair_timeout)
+            if not event or not (event.group(0) == 'Pairing successful'
+                                 or event.group(0).endswith('AlreadyExists')):
+                logging.warning(f"{self.name}: pairing failed")
+                return False
+
+        if info.get('Trusted') != 'yes':
+            self._set_state(TRUSTING)
+            output = await self.backend.command(f'trust {self.mac}')
+            if not any('trust succeeded' in line for line in output):
+                logging.warning(f"{self.name}: trust failed")
+                return False
+
+        self._set_state(CONNECTING)
+        event = await self.backend.action(
+            f'connect {self.mac}',
+            rf'Connection successful|Failed to connect|{re.escape(self.mac)} not available',
+            self.connect_timeout)
+        return bool(event) and event.group(0) == 'Connection successful'
+
+    async def backoff(self, stop, reason):
+        """Count a failure and wait out its backoff (or until stop)"""
+        self.failures += 1
+        delay = self.backoff_delay()
+        logging.warning(f"{self.name}: {reason}, retrying in {delay:.1f} s")
+        self._set_state(BACKOFF)
+        try:
+            await asyncio.wait_for(stop.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+
+    async def run(self, stop):
+        while not stop.is_set():
+            try:
+                await self.check(stop)
+            except Exception as e:
+                # A broken pipe or timeout on the shared session must not
+                # end the gather() that runs every other device
+                logging.exception(f"{self.name}: error while checking")
+                metrics.count('bt_errors', device=self.name)
+                await self.backoff(stop, f"error ({e.__class__.__name__})")
+
+    async def check(self, stop):
+        """One check: watch a connected device, or try to connect it"""
+        self._set_state(CHECKING)
+        with metrics.span('bt_check', device=self.name):
+            info = await self.backend.info(self.mac)
+
+        if info.get('Connected') == 'yes':
+            if self.disconnected_since is not None:
+                elapsed = time.monotonic() - self.disconnected_since
+                self.reconnect_times.append(elapsed)
+                metrics.observe('bt_reconnect', elapsed, device=self.name)
+                logging.info(f"{self.name}: connected (time to reconnect: {elapsed:.2f} s)")
+                self.disconnected_since = None
+            self.failures = 0
+            self._set_state(CONNECTED)
+            # Sleep until a disconnect event, the next check, or shutdown
+            since = self.backend.mark()
+            watch = asyncio.ensure_future(self.backend.wait_for(
+                rf'Device {re.escape(self.mac)} Connected: no', self.check_interval, since))
+            stopped = asyncio.ensure_future(stop.wait())
+            await asyncio.wait({watch, stopped}, return_when=asyncio.FIRST_COMPLETED)
+            watch.cancel()
+            stopped.cancel()
+            return
+
+        if self.disconnected_since is None:
+            self.disconnected_since = time.monotonic()
+            logging.warning(f"{self.name}: not connected")
+
+        with metrics.span('bt_connect', device=self.name) as span:
+            connected = await self.connect_sequence(info)
+            span.set(result='connected' if connected else 'failed')
+        if not connected:
+            await self.backoff(stop, f"attempt {self.failures + 1} failed")
+
+class BluetoothManager:
+    """Supervises every configured device over one backend"""
+
+    def __init__(self, devices, backend=None, check_interval=30, scan_time=10, **supervisor_args):
+        self.backend = backend or AsyncBluetoothctl()
+        self.scanner = ScanCoordinator(self.backend, scan_time)
+        self.supervisors = [
+            DeviceSupervisor(mac, name, self.backend, self.scanner,
+                             check_interval=check_interval, **supervisor_args)
+            for mac, name in devices
+        ]
+        self.stop_event = None
+
+    async def run(self, duration=None):
+        self.stop_event = asyncio.Event()
+        await self.backend.start()
+        await self.backend.command('power on')
+        tasks = [asyncio.ensure_future(s.run(self.stop_event)) for s in self.supervisors]
+        try:
+            if duration is None:
+                await asyncio.gather(*tasks)
+            else:
+                await asyncio.sleep(duration)
+        finally:
+            self.stop_event.set()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self.backend.close()
+
+    def stop(self):
+        if self.stop_event is not None:
+            self.stop_event.set()
+
+    def report(self):
+        report = {'scans': self.scanner.scans, 'devices': {}}
+        for s in self.supervisors:
+            times = s.reconnect_times
+            report['devices'][s.name] = {
+                'state': s.state,
+                'reconnects': len(times),
+                'reconnect_mean_s': round(statistics.mean(times), 3) if times else None,
+                'reconnect_max_s': round(max(times), 3) if times else None,
+            }
+        return report
+
+def cpu_seconds():
+    """CPU time of this process and its finished children"""
+    total = time.process_time()
+    if resource is not None:
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        total += usage.ru_utime + usage.ru_stime
+    return total
+
+def parse_device(value):
+    mac, _, name = value.partition('=')
+    return mac.upper(), name or None
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep several Bluetooth devices connected")
+    parser.add_argument('--device', action='append', type=parse_device, default=[],
+                        help="MAC[=name], repeat for each device")
+    parser.add_argument('--check-interval', type=float, default=30)
+    parser.add_argument('--scan-time', type=float, default=10)
+    parser.add_argument('--fake', nargs='?', const='', metavar='SCENARIO',
+                        help="use fake_bluetoothctl.py (optionally with a scenario JSON)")
+    parser.add_argument('--bench', type=float, metavar='SECONDS',
+                        help="run for SECONDS and print reconnect latency and CPU use as JSON")
+    args = parser.parse_args()
+
+    metrics.setup_logging()
+    metrics.enable_from_env()
+
+    if args.fake is not None:
+        command = [sys.executable, FAKE_BLUETOOTHCTL] + ([args.fake] if args.fake else [])
+        backend = AsyncBluetoothctl(command=command)
+        devices = args.device
+        if not devices:
+            from fake_bluetoothctl import DEFAULT_SCENARIO
+            scenario = DEFAULT_SCENARIO
+            if args.fake:
+                with open(args.fake) as f:
+                    scenario = json.load(f)
+            devices = [(mac, d.get('name')) for mac, d in scenario['devices'].items()]
+    else:
+        backend = AsyncBluetoothctl()
+        devices = args.device
+    if not devices:
+        parser.error("at least one --device is required")
+
+    manager = BluetoothManager(devices, backend, check_interval=args.check_interval,
+                               scan_time=args.scan_time)
+    wall, cpu = time.monotonic(), cpu_seconds()
+    try:
+        asyncio.run(manager.run(duration=args.bench))
+    except KeyboardInterrupt:
+        logging.info("Stopped by user")
+
+    if args.bench:
+        report = manager.report()
+        elapsed = time.monotonic() - wall
+        used = cpu_seconds() - cpu
+        report['wall_s'] = round(elapsed, 2)
+        report['cpu_s'] = round(used, 3)
+        report['cpu_percent'] = round(100 * used / elapsed, 2) if elapsed else 0.0
+        print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
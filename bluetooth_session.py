@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""Long-lived interactive bluetoothctl session.
+
+One bluetoothctl process is kept open. Commands are written to its
+stdin, and a reader thread collects its output as clean lines (ANSI
+colours and prompts removed). Each command is followed by 'version',
+whose "Version x.y" reply marks the end of the command's output. Device
+info is cached until new_cycle() is called, so one monitoring cycle asks
+bluetoothctl about each device only once.
+"""
+import os
+import re
+import subprocess
+import threading
+import time
+import logging
+
+ANSI_RE = re.compile(r'\x1b\[[0-9;?]*[A-Za-z]|\x01|\x02')
+PROMPT_RE = re.compile(r'^(\[[^\]]*\][#>]\s*)+')
+VERSION_RE = re.compile(r'^Version \d')
+DEVICE_RE = re.compile(r'^Device ([0-9A-F]{2}(?::[0-9A-F]{2}){5})\b', re.IGNORECASE)
+
+class BluetoothctlSession:
+    """One bluetoothctl process shared by all checks and actions"""
+
+    def __init__(self, use_sudo=True, command=None):
+        self.command_line = command or (['sudo', 'bluetoothctl'] if use_sudo else ['bluetoothctl'])
+        self.process = None
+        self._lines = []
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._cache = {}
+
+    # -- process management -------------------------------------------------
+
+    def start(self):
+        if self.is_alive():
+            return
+        self.process = subprocess.Popen(
+            self.command_line, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT, bufsize=0)
+        with self._cond:
+            self._lines = []
+        threading.Thread(target=self._reader, args=(self.process,),
+                         name='bluetoothctl-reader', daemon=True).start()
+        logging.info(f"bluetoothctl session started (pid {self.process.pid})")
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def close(self):
+        if not self.is_alive():
+            return
+        try:
+            self.send('quit')
+            self.process.wait(timeout=3)
+        except (OSError, subprocess.TimeoutExpired):
+            self.process.kill()
+
+    def _reader(self, process):
+        buffer = ''
+        fd = process.stdout.fileno()
+        while True:
+            try:
+                chunk = os.read(fd, 4096)
+            except OSError:
+                break
+            if not chunk:
+                break
+            buffer += chunk.decode('utf-8', errors='replace')
+            parts = re.split(r'[\r\n]', buffer)
+            buffer = parts.pop()
+            lines = [PROMPT_RE.sub('', ANSI_RE.sub('', part)).strip() for part in parts]
+            with self._cond:
+                self._lines.extend(line for line in lines if line)
+                self._cond.notify_all()
+        with self._cond:
+            self._cond.notify_all()
+
+    # -- output handling ----------------------------------------------------
+
+    def mark(self):
+        """Position in the output stream, for wait_for(since=...)"""
+        with self._cond:
+            return len(self._lines)
+
+    def send(self, cmd):
+        self.start()
+        with self._write_lock:
+            self.process.stdin.write((cmd + '\n').encode())
+            self.process.stdin.flush()
+
+    def wait_for(self, pattern, timeout, since=None):
+        """First line matching pattern after position since, or None on timeout"""
+        regex = re.compile(pattern) if isinstance(pattern, str) else pattern
+        deadline = time.time() + timeout
+        with self._cond:
+            index = self.mark() if since is None else since
+            while True:
+                while index < len(self._lines):
+                    match = regex.search(self._lines[index])
+                    index += 1
+                    if match:
+                        return match
+                remaining = deadline - time.time()
+                if remaining <= 0 or not self.is_alive():
+                    return None
+                self._cond.wait(remaining)
+
+    def command(self, cmd, timeout=10):
+        """Run a command and return the lines it printed"""
+        start = self.mark()
+        self.send(cmd)
+        self.send('version')
+        if self.wait_for(VERSION_RE, timeout, since=start) is None:
+            logging.warning(f"bluetoothctl '{cmd}' timed out")
+        with self._cond:
+            lines = self._lines[start:]
+            # Trim the buffer so a long-running session does not grow forever
+            if len(self._lines) > 5000:
+                del self._lines[:len(self._lines) - 1000]
+        return [line for line in lines if not VERSION_RE.match(line)]
+
+    # -- cached queries -----------------------------------------------------
+
+    def new_cycle(self):
+        """Forget cached device state (call once per monitoring cycle)"""
+        self._cache = {}
+
+    def invalidate(self, mac=None):
+        self._cache.pop('devices', None)
+        if mac:
+            self._cache.pop(('info', mac), None)
+
+    def info(self, mac):
+        """'Key: value' fields from 'info <mac>' (empty if unknown)"""
+        key = ('info', mac)
+        if key not in self._cache:
+            fields = {}
+            for line in self.command(f'info {mac}'):
+                if ':' in line and not line.startswith('Device'):
+                    name, _, value = line.partition(':')
+                    fields[name.strip()] = value.strip()
+            self._cache[key] = fields
+        return self._cache[key]
+
+    def devices(self):
+        """MAC addresses listed by 'devices'"""
+        if 'devices' not in self._cache:
+            macs = set()
+            for line in self.command('devices'):
+                match = DEVICE_RE.match(line)
+                if match:
+                    macs.add(match.group(1).upper())
+            self._cache['devices'] = macs
+        return self._cache['devices']
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""Scripted stand-in for an interactive bluetoothctl.
+
+Speaks enough of the bluetoothctl protocol (prompt, power, devices,
+info, pair, trust, connect, scan, version, quit) to drive
+bluetooth_session.py and bluetooth_manager.py without hardware.
+Delays, failures and periodic disconnects come from a JSON scenario:
+
+    python fake_bluetoothctl.py [scenario.json]
+
+{
+  "devices": {
+    "AA:AA:AA:AA:AA:01": {"name": "Headset", "paired": true, "trusted": true,
+                          "connected": false, "connect_delay": 0.5,
+                          "pair_delay": 1.0, "discover_delay": 0.3,
+                          "connect_failures": 1, "drop_every": 5.0}
+  }
+}
+"""
+import json
+import sys
+import threading
+
+PROMPT = '\x1b[0;94m[bluetooth]\x1b[0m# '
+
+DEFAULT_SCENARIO = {
+    'devices': {
+        'AA:AA:AA:AA:AA:01': {'name': 'Headset', 'paired': True, 'trusted': True,
+                              'connected': False, 'connect_delay': 0.5,
+                              'discover_delay': 0.3, 'connect_failures': 1,
+                              'drop_every': 5.0},
+        'AA:AA:AA:AA:AA:02': {'name': 'Clicker', 'paired': False, 'trusted': False,
+                              'connected': False, 'connect_delay': 0.3,
+                              'pair_delay': 0.8, 'discover_delay': 1.0,
+                              'drop_every': 7.0},
+    }
+}
+
+class FakeBluetoothctl:
+    def __init__(self, scenario, out=sys.stdout):
+        self.out = out
+        self.devices = {mac.upper(): dict(device) for mac, device in scenario['devices'].items()}
+        for device in self.devices.values():
+            device.setdefault('known', device.get('paired', False))
+        self.powered = False
+        self.scanning = False
+        self._lock = threading.Lock()
+        self._timers = []
+
+    def emit(self, *lines):
+        with self._lock:
+            for line in lines:
+                self.out.write('\r' + line + '\n')
+            self.out.write(PROMPT)
+            self.out.flush()
+
+    def later(self, delay, fn, *args):
+        timer = threading.Timer(delay, fn, args)
+        timer.daemon = True
+        timer.start()
+        self._timers.append(timer)
+
+    def start_drops(self):
+        for mac, device in self.devices.items():
+            if device.get('drop_every'):
+                self.later(device['drop_every'], self._drop, mac)
+
+    def _drop(self, mac):
+        device = self.devices[mac]
+        if device['connected']:
+            device['connected'] = False
+            self.emit(f"[CHG] Device {mac} Connected: no")
+        self.later(device['drop_every'], self._drop, mac)
+
+    def _device(self, mac):
+        device = self.devices.get(mac.upper())
+        if device is None or not device['known']:
+            self.emit(f"Device {mac} not available")
+            return None
+        return device
+
+    def handle(self, line):
+        parts = line.split()
+        if not parts:
+            self.emit()
+            return True
+        cmd, args = parts[0], parts[1:]
+        mac = args[0].upper() if args else None
+
+        if cmd in ('quit', 'exit'):
+            return False
+        if cmd == 'version':
+            self.emit('Version 5.66')
+        elif cmd == 'power':
+            self.powered = args[:1] == ['on']
+            self.emit(f"Changing power {args[0] if args else 'on'} succeeded")
+        elif cmd in ('agent', 'default-agent'):
+            self.emit('Agent registered' if cmd == 'agent' else 'Default agent request successful')
+        elif cmd == 'devices':
+            self.emit(*[f"Device {m} {d['name']}" for m, d in self.devices.items() if d['known']])
+        elif cmd == 'info':
+            device = self._device(mac)
+            if device:
+                yes = lambda key: 'yes' if device.get(key) else 'no'
+                self.emit(f"Device {mac} (public)", f"\tName: {device['name']}",
+                          f"\tPaired: {yes('paired')}", f"\tTrusted: {yes('trusted')}",
+                          f"\tConnected: {yes('connected')}")
+        elif cmd == 'trust':
+            device = self._device(mac)
+            if device:
+                device['trusted'] = True
+                self.emit(f"[CHG] Device {mac} Trusted: yes", f"Changing {mac} trust succeeded")
+        elif cmd == 'pair':
+            device = self._device(mac)
+            if device:
+                self.emit(f"Attempting to pair with {mac}")
+                self.later(device.get('pair_delay', 0.5), self._paired, mac)
+        elif cmd == 'connect':
+            device = self._device(mac)
+            if device:
+                self.emit(f"Attempting to connect to {mac}")
+                self.later(device.get('connect_delay', 0.5), self._connected, mac)
+        elif cmd == 'scan':
+            self.scanning = args[:1] == ['on']
+            if self.scanning:
+                self.emit('Discovery started')
+                for m, device in self.devices.items():
+                    self.later(device.get('discover_delay', 0.5), self._discovered, m)
+            else:
+                self.emit('Discovery stopped')
+        else:
+            self.emit(f"Invalid command in menu main: {cmd}")
+        return True
+
+    def _paired(self, mac):
+        device = self.devices[mac]
+        if device.get('paired'):
+            self.emit("Failed to pair: org.bluez.Error.AlreadyExists")
+            return
+        device['paired'] = True
+        self.emit(f"[CHG] Device {mac} Paired: yes", "Pairing successful")
+
+    def _connected(self, mac):
+        device = self.devices[mac]
+        if device.get('connect_failures', 0) > 0:
+            device['connect_failures'] -= 1
+            self.emit("Failed to connect: org.bluez.Error.Failed br-connection-page-timeout")
+            return
+        device['connected'] = True
+        self.emit(f"[CHG] Device {mac} Connected: yes", "Connection successful")
+
+    def _discovered(self, mac):
+        if not self.scanning:
+            return
+        device = self.devices[mac]
+        if device['known']:
+            self.emit(f"[CHG] Device {mac} RSSI: -60")
+        else:
+            device['known'] = True
+            self.emit(f"[NEW] Device {mac} {device['name']}")
+
+    def run(self, stdin=sys.stdin):
+        self.emit('Agent registered')
+        self.start_drops()
+        for line in stdin:
+            if not self.handle(line.strip()):
+                break
+        for timer in self._timers:
+            timer.cancel()
+
+def main():
+    scenario = DEFAULT_SCENARIO
+    if len(sys.argv) > 1:
+        with open(sys.argv[1]) as f:
+            scenario = json.load(f)
+    FakeBluetoothctl(scenario).run()
+
+if __name__ == "__main__":
+    main()
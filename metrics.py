@@ -0,0 +1,303 @@
+"""Stage timers, counters and gauges with a periodic file export.
+
+    import metrics
+
+    with metrics.span('ocr_config', config=config):
+        ...
+
+    @metrics.timed('ocr_preprocess')
+    def preprocess_image(img):
+        ...
+
+    metrics.count('ocr_cache_hits')
+
+Nothing is recorded until enable() is called, so a span costs one flag
+check while metrics are off. Entry points call enable_from_env(), which
+turns metrics on when STEWARD_METRICS=1. Once enabled, an exporter
+thread rewrites <dir>/steward.prom every `interval` seconds for the
+Prometheus node_exporter textfile collector. It also appends a snapshot
+to <dir>/metrics.jsonl.
+
+setup_logging() replaces logging.basicConfig(). Records go through a
+bounded queue to a listener thread, so a slow SD card or log file never
+blocks the caller. If the queue is full, records are dropped and
+counted.
+"""
+import atexit
+import bisect
+import functools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+
+METRICS_DIR = os.environ.get('STEWARD_METRICS_DIR',
+                             os.path.join(os.path.expanduser('~'), '.steward', 'metrics'))
+EXPORT_INTERVAL = 15
+JSONL_MAX_BYTES = 1024 * 1024  # metrics.jsonl is rotated to metrics.jsonl.1 past this
+PREFIX = 'steward_'
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+LOG_QUEUE_SIZE = 10000
+
+_enabled = False
+_lock = threading.Lock()
+_timings = {}    # (name, labels) -> [count, sum, max, per-bucket counts]
+_counters = {}   # (name, labels) -> value
+_gauges = {}     # (name, labels) -> value
+_exporter = None
+_listener = None
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+# -- recording --------------------------------------------------------------
+
+def observe(name, seconds, **labels):
+    """Record one duration"""
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        entry = _timings.get(key)
+        if entry is None:
+            entry = _timings[key] = [0, 0.0, 0.0, [0] * len(BUCKETS)]
+        entry[0] += 1
+        entry[1] += seconds
+        if seconds > entry[2]:
+            entry[2] = seconds
+        index = bisect.bisect_left(BUCKETS, seconds)
+        if index < len(BUCKETS):
+            entry[3][index] += 1
+
+def count(name, value=1, **labels):
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+def gauge(name, value, **labels):
+    if not _enabled:
+        return
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+class _Span:
+    __slots__ = ('name', 'labels', 'start')
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+
+    def set(self, **labels):
+        """Add labels once the outcome is known (e.g. result='failed')"""
+        self.labels = dict(self.labels, **labels)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe(self.name, time.perf_counter() - self.start, **self.labels)
+        if exc_type is not None:
+            count(self.name + '_errors', **self.labels)
+        return False
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, **labels):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NOOP_SPAN = _NoopSpan()
+
+def span(name, **labels):
+    """Context manager that records how long its block took"""
+    if not _enabled:
+        return _NOOP_SPAN
+    return _Span(name, labels)
+
+def timed(name, **labels):
+    """Decorator form of span()"""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Span(name, labels):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+# -- export -----------------------------------------------------------------
+
+def snapshot():
+    """Current values as plain data"""
+    with _lock:
+        timings = [{'name': name, 'labels': dict(labels), 'count': c, 'sum': round(s, 6),
+                    'max': round(m, 6)}
+                   for (name, labels), (c, s, m, _) in _timings.items()]
+        counters = [{'name': name, 'labels': dict(labels), 'value': value}
+                    for (name, labels), value in _counters.items()]
+        gauges = [{'name': name, 'labels': dict(labels), 'value': value}
+                  for (name, labels), value in _gauges.items()]
+    return {'time': time.time(), 'timings': timings, 'counters': counters, 'gauges': gauges}
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+def _labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+def render_prometheus():
+    """Everything recorded so far in the Prometheus text format"""
+    with _lock:
+        timings = sorted((k, (c, s, m, list(b))) for k, (c, s, m, b) in _timings.items())
+        counters = sorted(_counters.items())
+        gauges = sorted(_gauges.items())
+
+    lines, typed = [], set()
+    for (name, labels), (total, seconds, _, buckets) in timings:
+        metric = f'{PREFIX}{name}_seconds'
+        if metric not in typed:
+            typed.add(metric)
+            lines.append(f'# TYPE {metric} histogram')
+        cumulative = 0
+        for bound, n in zip(BUCKETS, buckets):
+            cumulative += n
+            lines.append(f'{metric}_bucket{_labels(labels, [("le", bound)])} {cumulative}')
+        lines.append(f'{metric}_bucket{_labels(labels, [("le", "+Inf")])} {total}')
+        lines.append(f'{metric}_sum{_labels(labels)} {seconds:.6f}')
+        lines.append(f'{metric}_count{_labels(labels)} {total}')
+    for kind, suffix, items in (('counter', '_total', counters), ('gauge', '', gauges)):
+        for (name, labels), value in items:
+            metric = f'{PREFIX}{name}{suffix}'
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f'# TYPE {metric} {kind}')
+            lines.append(f'{metric}{_labels(labels)} {value}')
+    return '\n'.join(lines) + '\n'
+
+def export(directory=METRICS_DIR):
+    """Rewrite steward.prom and append a line to metrics.jsonl"""
+    os.makedirs(directory, exist_ok=True)
+    prom = os.path.join(directory, 'steward.prom')
+    # Written aside and renamed so the collector never reads half a file
+    with open(prom + '.tmp', 'w') as f:
+        f.write(render_prometheus())
+    os.replace(prom + '.tmp', prom)
+
+    jsonl = os.path.join(directory, 'metrics.jsonl')
+    try:
+        if os.path.getsize(jsonl) > JSONL_MAX_BYTES:
+            os.replace(jsonl, jsonl + '.1')
+    except OSError:
+        pass
+    with open(jsonl, 'a') as f:
+        f.write(json.dumps(snapshot()) + '\n')
+
+class _Exporter:
+    def __init__(self, directory, interval):
+        self.directory = directory
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='metrics-export', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.export()
+
+    def export(self):
+        try:
+            export(self.directory)
+        except OSError as e:
+            logging.warning(f"Metrics export to {self.directory} failed: {e}")
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=2)
+        self.export()
+
+def enable(directory=METRICS_DIR, interval=EXPORT_INTERVAL):
+    """Start recording, exporting every interval seconds (None: only at exit)"""
+    global _enabled, _exporter
+    _enabled = True
+    if _exporter is None:
+        _exporter = _Exporter(directory, interval)
+        atexit.register(shutdown)
+
+def enable_from_env():
+    if os.environ.get('STEWARD_METRICS', '') not in ('', '0'):
+        enable(interval=float(os.environ.get('STEWARD_METRICS_INTERVAL', EXPORT_INTERVAL)))
+
+def enabled():
+    return _enabled
+
+# -- logging ----------------------------------------------------------------
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full"""
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            count('log_records_dropped')
+
+def setup_logging(level=logging.INFO, log_file=None, fmt=LOG_FORMAT):
+    """Log to the console (and log_file) from a background listener thread"""
+    global _listener
+    formatter = logging.Formatter(fmt)
+    handlers = [logging.StreamHandler()]
+    file_error = None
+    if log_file:
+        try:
+            handlers.append(logging.FileHandler(log_file))
+        except OSError as e:
+            file_error = e
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    if _listener is not None:
+        _listener.stop()
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_DroppingQueueHandler(log_queue))
+    root.setLevel(level)
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_stop_logging)
+
+    if file_error is not None:
+        logging.warning(f"Cannot write {log_file} ({file_error}), logging to the console only")
+
+def _stop_logging():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def shutdown():
+    """Final export, then stop the exporter and flush the log queue"""
+    global _exporter
+    if _exporter is not None:
+        _exporter.stop()
+        _exporter = None
+    _stop_logging()
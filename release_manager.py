@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""A/B release slots for the updater.
+
+Layout under the releases base directory:
+
+    cache.git/          bare repository updates are fetched into
+    releases/<commit>/  one slot per release, with precompiled bytecode
+    data/               local state shared by every slot (see SHARED_STATE)
+    current -> releases/<commit>
+    previous -> releases/<commit>
+
+A new release is exported into its own slot and compiled there. A smoke
+import runs in a fresh interpreter, and only then is the `current`
+symlink swapped with an atomic rename. The live tree is never modified,
+so a failed update leaves the running release as it was. Caches and
+generated prompts live in data/ and are symlinked into each slot, so
+they survive a switch and the pruning of old slots. rollback()
+swaps `current` and `previous` back, which is just another rename, and
+remembers the bad commit so it is not reinstalled. The
+assistant must be started through the `current` path so a restart picks
+up the new slot.
+
+The remote can be any git URL, including a local bare repository:
+
+    python release_manager.py update --base ~/steward --remote /tmp/remote.git
+    python release_manager.py rollback --base ~/steward
+"""
+import argparse
+import compileall
+import os
+import shutil
+import subprocess
+import sys
+import tarfile
+
+REMOTE_URL = os.environ.get('STEWARD_UPDATE_REMOTE', "https://github.com/QuEB128/STEWARD_V.A")
+BASE_DIR = os.environ.get('STEWARD_RELEASES_DIR', os.path.expanduser('~/steward'))
+BRANCH = "main"
+# Modules that must import cleanly in a new slot (no hardware needed)
+SMOKE_IMPORTS = ['supervisor', 'metrics', 'auto_update', 'release_manager', 'bluetooth_session']
+# The reader, imported the way supervisor.load_reader() does it
+SMOKE_READER = os.path.join('Text_Extraction', 'main.py')
+GIT_TIMEOUT = 300
+# Gitignored state written at run time, relative to the slot; (path, is_dir)
+SHARED_STATE = [
+    ('Text_Extraction/prompts', True),
+    ('Text_Extraction/debug', True),
+    ('Text_Extraction/ocr_cache.json', False),
+    ('TTS_local_lang/tts_cache', True),
+]
+
+class ReleaseError(Exception):
+    pass
+
+class ReleaseManager:
+    def __init__(self, base=BASE_DIR, remote=REMOTE_URL, branch=BRANCH,
+                 smoke_imports=SMOKE_IMPORTS, shared_state=SHARED_STATE):
+        self.base = os.path.abspath(base)
+        self.remote = remote
+        self.branch = branch
+        self.smoke_imports = smoke_imports
+        self.shared_state = shared_state
+        self.cache = os.path.join(self.base, 'cache.git')
+        self.releases = os.path.join(self.base, 'releases')
+        self.data = os.path.join(self.base, 'data')
+        self.current_link = os.path.join(self.base, 'current')
+        self.previous_link = os.path.join(self.base, 'previous')
+        # Commit rolled back from; not reinstalled until the remote moves on
+        self.rejected_file = os.path.join(self.base, 'rejected')
+
+    def _git(self, *args, timeout=GIT_TIMEOUT, stdout=subprocess.PIPE):
+        return subprocess.run(['git', '--git-dir', self.cache, *args], check=True,
+                              timeout=timeout, stdout=stdout, stderr=subprocess.PIPE)
+
+    # -- state --------------------------------------------------------------
+
+    def _slot_of(self, link):
+        if not os.path.islink(link):
+            return None
+        return os.path.basename(os.path.realpath(link))
+
+    def current(self):
+        """Commit of the running release, or None"""
+        return self._slot_of(self.current_link)
+
+    def previous(self):
+        return self._slot_of(self.previous_link)
+
+    def rejected(self):
+        try:
+            with open(self.rejected_file) as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    def remote_head(self):
+        """Tip of the remote branch, using one ls-remote round trip"""
+        try:
+            output = subprocess.run(
+                ['git', 'ls-remote', self.remote, f'refs/heads/{self.branch}'],
+                check=True, timeout=30, stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE).stdout.decode().strip()
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
+            return None
+        return output.split()[0] if output else None
+
+    # -- staging ------------------------------------------------------------
+
+    def fetch(self, commit):
+        if not os.path.isdir(self.cache):
+            os.makedirs(self.base, exist_ok=True)
+            subprocess.run(['git', 'init', '-q', '--bare', self.cache], check=True)
+        self._git('fetch', '--no-tags', '--depth=1', self.remote,
+                  f'+refs/heads/{self.branch}:refs/heads/{self.branch}')
+        fetched = self._git('rev-parse', f'refs/heads/{self.branch}').stdout.decode().strip()
+        if fetched != commit:
+            # The branch moved between ls-remote and fetch; use what we got
+            return fetched
+        return commit
+
+    def stage(self, commit):
+        """Export commit into its own slot and precompile it"""
+        slot = os.path.join(self.releases, commit)
+        if os.path.isdir(slot):
+            return slot
+        os.makedirs(self.releases, exist_ok=True)
+        tmp = slot + '.staging'
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+
+        archive = subprocess.Popen(['git', '--git-dir', self.cache, 'archive', commit],
+                                   stdout=subprocess.PIPE)
+        with tarfile.open(fileobj=archive.stdout, mode='r|') as tar:
+            tar.extractall(tmp)
+        if archive.wait() != 0:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise ReleaseError(f"git archive {commit} failed")
+
+        self.link_state(tmp)
+
+        # Bytecode is written now so the first start does not pay for it
+        if not compileall.compile_dir(tmp, quiet=1):
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise ReleaseError(f"release {commit[:7]} does not compile")
+
+        os.rename(tmp, slot)
+        return slot
+
+    def link_state(self, slot):
+        """Point the slot's state paths at data/
+
+        State still inside the running slot (a release from before data/
+        existed) is copied to data/ first, so nothing is lost.
+        """
+        current = os.path.realpath(self.current_link) if os.path.islink(self.current_link) else None
+        for path, is_dir in self.shared_state:
+            target = os.path.join(self.data, path)
+            link = os.path.join(slot, path)
+            if os.path.lexists(link):
+                continue  # shipped with the release
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            old = os.path.join(current, path) if current else None
+            if (old and not os.path.lexists(target) and os.path.exists(old)
+                    and not os.path.islink(old)):
+                if os.path.isdir(old):
+                    shutil.copytree(old, target)
+                else:
+                    shutil.copy2(old, target)
+            if is_dir:
+                os.makedirs(target, exist_ok=True)
+            os.makedirs(os.path.dirname(link), exist_ok=True)
+            os.symlink(target, link)
+
+    def smoke_test(self, slot):
+        """Import the core modules and the reader from the slot in a fresh interpreter"""
+        modules = [m for m in self.smoke_imports
+                   if os.path.exists(os.path.join(slot, m + '.py'))]
+        code = [f"import {m}" for m in modules]
+        if os.path.exists(os.path.join(slot, SMOKE_READER)):
+            reader_dir = os.path.dirname(SMOKE_READER)
+            code += ["import sys", f"sys.path.insert(0, {reader_dir!r})", "import main"]
+        if not code:
+            return True
+        result = subprocess.run([sys.executable, '-c', '; '.join(code)],
+                                cwd=slot, timeout=60, stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            print(f"❌ Smoke import failed:\n{result.stderr.decode(errors='replace')}")
+        return result.returncode == 0
+
+    # -- switching ----------------------------------------------------------
+
+    def _point(self, link, slot):
+        """Atomically make link point at slot"""
+        tmp = link + '.new'
+        if os.path.lexists(tmp):
+            os.remove(tmp)
+        os.symlink(os.path.relpath(slot, self.base), tmp)
+        os.replace(tmp, link)
+
+    def activate(self, slot):
+        old = os.path.realpath(self.current_link) if os.path.islink(self.current_link) else None
+        if old and old != os.path.realpath(slot):
+            self._point(self.previous_link, old)
+        self._point(self.current_link, slot)
+        self.prune()
+
+    def rollback(self):
+        """Swap current and previous; returns the commit now running"""
+        previous = os.path.realpath(self.previous_link) if os.path.islink(self.previous_link) else None
+        if not previous or not os.path.isdir(previous):
+            raise ReleaseError("no previous release to roll back to")
+        current = os.path.realpath(self.current_link)
+        self._point(self.current_link, previous)
+        self._point(self.previous_link, current)
+        with open(self.rejected_file, 'w') as f:
+            f.write(os.path.basename(current) + '\n')
+        return os.path.basename(previous)
+
+    def prune(self):
+        """Delete slots other than current and previous"""
+        keep = {self.current(), self.previous()}
+        for name in os.listdir(self.releases):
+            if name not in keep:
+                shutil.rmtree(os.path.join(self.releases, name), ignore_errors=True)
+
+    def update(self):
+        """Stage, verify and switch to the remote tip; True if a new release is live"""
+        print("🔍 Checking for updates...")
+        latest = self.remote_head()
+        if latest is None:
+            print("⚠️ Update server unreachable, skipping")
+            return False
+        if latest == self.current():
+            print("✅ Already up to date!")
+            return False
+        if latest == self.rejected():
+            print(f"⚠️ Release {latest[:7]} was rolled back, waiting for a newer one")
+            return False
+
+        print(f"📥 Staging release {latest[:7]}...")
+        try:
+            commit = self.fetch(latest)
+            slot = self.stage(commit)
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired, ReleaseError) as e:
+            print(f"❌ Staging failed: {e}")
+            return False
+        if commit == self.current():
+            return False
+        if not self.smoke_test(slot):
+            shutil.rmtree(slot, ignore_errors=True)
+            return False
+
+        self.activate(slot)
+        print(f"✅ Release {commit[:7]} is live (previous: {(self.previous() or '-')[:7]})")
+        return True
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage A/B release slots")
+    parser.add_argument('action', choices=['update', 'rollback', 'status'])
+    parser.add_argument('--base', default=BASE_DIR)
+    parser.add_argument('--remote', default=REMOTE_URL)
+    parser.add_argument('--branch', default=BRANCH)
+    args = parser.parse_args()
+
+    manager = ReleaseManager(args.base, args.remote, args.branch)
+    if args.action == 'update':
+        return 0 if manager.update() else 1
+    if args.action == 'rollback':
+        try:
+            print(f"⏪ Rolled back to {manager.rollback()[:7]}")
+        except ReleaseError as e:
+            print(f"❌ {e}")
+            return 1
+        return 0
+    print(f"current: {manager.current() or '-'}")
+    print(f"previous: {manager.previous() or '-'}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""Single entry point for the assistant.
+
+Starts the text reader, the Bluetooth manager and the update service as
+managed workers in one process. Heavy modules (cv2, pytesseract, pyttsx3,
+enchant) are imported only when the reader is loaded. The OCR engines,
+wordlist and speech engine are warmed once, and stay warm when the
+reader restarts.
+
+The reader runs on the main thread, because OpenCV's highgui (Qt in
+particular) must only be driven from the thread that owns its windows.
+The other workers run on their own threads, and a monitor thread checks
+them all every HEALTH_INTERVAL seconds. A worker that crashes is restarted with
+exponential backoff. A worker whose heartbeat goes stale is asked to
+stop, then restarted. Time to the first spoken prompt is reported for
+the cold start and for every warm restart.
+
+    python supervisor.py [--source 0] [--camera-api v4l2] [--headless] [--device MAC=name] [--no-updates] [--metrics]
+"""
+import argparse
+import asyncio
+import importlib.util
+import logging
+import os
+import sys
+import threading
+import time
+
+import metrics
+
+PROCESS_START = time.perf_counter()
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+READER_DIR = os.path.join(BASE_DIR, 'Text_Extraction')
+READER_PATH = os.path.join(READER_DIR, 'main.py')
+
+HEALTH_INTERVAL = 2.0
+READER_HEARTBEAT_TIMEOUT = 10.0
+BLUETOOTH_HEARTBEAT_TIMEOUT = 10.0
+RESTART_BACKOFF = 2.0
+RESTART_BACKOFF_MAX = 60.0
+MAX_RESTARTS = 5          # within RESTART_WINDOW seconds, then the worker is given up
+RESTART_WINDOW = 300.0
+
+def load_reader():
+    """Import Text_Extraction/main.py (and with it cv2, pytesseract, pyttsx3)"""
+    if 'steward_reader' in sys.modules:
+        return sys.modules['steward_reader']
+    if READER_DIR not in sys.path:
+        sys.path.insert(0, READER_DIR)
+    # Loaded under its own name so it cannot clash with another 'main' module
+    spec = importlib.util.spec_from_file_location('steward_reader', READER_PATH)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['steward_reader'] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules['steward_reader']
+        raise
+    return module
+
+class Worker:
+    """A restartable subsystem running on its own thread, or on the main thread
+
+    target(worker) runs until worker.stopping is set. Returning normally
+    means the worker is done; raising means it crashed. For a main_thread
+    worker, start() only requests a run, and the main thread carries it
+    out in run_pending().
+    """
+
+    def __init__(self, name, target, heartbeat_timeout=None, essential=False,
+                 main_thread=False):
+        self.name = name
+        self.target = target
+        self.heartbeat_timeout = heartbeat_timeout
+        self.essential = essential    # the supervisor exits when this worker finishes
+        self.main_thread = main_thread
+        self.stopping = threading.Event()
+        self.thread = None
+        self._pending = threading.Event()  # main_thread: start() asked for a run
+        self._running = False
+        self.last_beat = 0.0
+        self.started_at = 0.0
+        self.runs = 0
+        self.crashes = []             # monotonic times of recent crashes
+        self.failed = False
+        self.gave_up = False
+        self.next_start = 0.0
+        self._stop_callbacks = []
+
+    def start(self):
+        if self.runs:
+            metrics.count('worker_restarts', worker=self.name)
+        self.stopping.clear()
+        self._stop_callbacks = []
+        self.failed = False
+        self.runs += 1
+        self.started_at = self.last_beat = time.monotonic()
+        if self.main_thread:
+            self._running = True
+            self._pending.set()
+            return
+        self.thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self.thread.start()
+
+    def run_pending(self, timeout):
+        """Main thread only: run the worker if start() asked for it
+
+        Returns False if no run was requested within timeout.
+        """
+        if not self._pending.wait(timeout):
+            return False
+        self._pending.clear()
+        try:
+            self._run()
+        finally:
+            self._running = False
+        return True
+
+    def _run(self):
+        try:
+            self.target(self)
+        except Exception:
+            logging.exception(f"Worker {self.name} crashed")
+            self.failed = True
+
+    def beat(self):
+        self.last_beat = time.monotonic()
+
+    def on_stop(self, callback):
+        """Run callback when the worker is asked to stop (or now, if it already was)"""
+        self._stop_callbacks.append(callback)
+        if self.stopping.is_set():
+            callback()
+
+    def stop(self):
+        if self.stopping.is_set():
+            return
+        self.stopping.set()
+        for callback in self._stop_callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logging.warning(f"Stopping {self.name}: {e}")
+
+    def join(self, timeout=None):
+        # A main-thread worker has returned by the time the main thread joins
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    @property
+    def alive(self):
+        if self.main_thread:
+            return self._running
+        return self.thread is not None and self.thread.is_alive()
+
+    def healthy(self):
+        if not self.alive:
+            return False
+        if self.heartbeat_timeout is None:
+            return True
+        return time.monotonic() - self.last_beat < self.heartbeat_timeout
+
+    def schedule_restart(self):
+        """Record a crash; returns False once the worker keeps failing"""
+        now = time.monotonic()
+        self.crashes = [t for t in self.crashes if now - t < RESTART_WINDOW] + [now]
+        if len(self.crashes) > MAX_RESTARTS:
+            self.gave_up = True
+            return False
+        delay = min(RESTART_BACKOFF * 2 ** (len(self.crashes) - 1), RESTART_BACKOFF_MAX)
+        self.next_start = now + delay
+        return True
+
+class Supervisor:
+    def __init__(self, reader_argv=(), devices=(), updates=True, fake_bluetooth=False):
+        self.reader_argv = list(reader_argv)
+        self.devices = list(devices)
+        self.fake_bluetooth = fake_bluetooth
+        self.updates = updates
+        self.reader = None
+        self.workers = []
+        self.start_times = []         # (kind, seconds to first prompt)
+        self.restart_requested = False
+        self._stop = threading.Event()
+
+    # -- warm-up ------------------------------------------------------------
+
+    def warm_up(self):
+        """Import the reader and warm its OCR and speech engines"""
+        started = time.perf_counter()
+        try:
+            self.reader = load_reader()
+        except Exception:
+            # The reader worker retries the import and is restarted with backoff
+            logging.exception("Reader import failed")
+            return
+        imported = time.perf_counter()
+        try:
+            self.reader.warm_up()
+        except Exception:
+            logging.exception("Reader warm-up failed, engines will start on first use")
+        logging.info(f"Reader imported in {imported - started:.2f} s, "
+                     f"engines warm after {time.perf_counter() - started:.2f} s")
+
+    # -- workers ------------------------------------------------------------
+
+    def _run_reader(self, worker):
+        if self.reader is None:
+            self.reader = load_reader()
+        cold = worker.runs == 1
+        started = PROCESS_START if cold else time.perf_counter()
+
+        def on_ready():
+            elapsed = time.perf_counter() - started
+            kind = 'cold' if cold else 'warm'
+            self.start_times.append((kind, elapsed))
+            metrics.observe('first_prompt', elapsed, kind=kind)
+            logging.info(f"⏱ {kind.capitalize()} start: first prompt after {elapsed:.2f} s")
+
+        reason = self.reader.main(self.reader_argv, stop=worker.stopping, heartbeat=worker.beat,
+                                  on_ready=on_ready, keep_warm=True)
+        if reason == 'camera_error':
+            raise RuntimeError("camera stopped delivering frames")
+
+    def _run_bluetooth(self, worker):
+        import bluetooth_manager
+
+        if self.fake_bluetooth:
+            command = [sys.executable, bluetooth_manager.FAKE_BLUETOOTHCTL]
+            backend = bluetooth_manager.AsyncBluetoothctl(command=command)
+        else:
+            backend = bluetooth_manager.AsyncBluetoothctl()
+        manager = bluetooth_manager.BluetoothManager(self.devices, backend)
+
+        async def heartbeat():
+            while True:
+                worker.beat()
+                await asyncio.sleep(1)
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            worker.on_stop(lambda: loop.call_soon_threadsafe(manager.stop))
+            beats = asyncio.ensure_future(heartbeat())
+            try:
+                await manager.run()
+            finally:
+                beats.cancel()
+
+        asyncio.run(run())
+        if not worker.stopping.is_set():
+            raise RuntimeError("Bluetooth manager exited")
+
+    def _run_updates(self, worker):
+        import auto_update
+
+        def idle():
+            return self.reader is None or self.reader.is_idle()
+
+        def restart():
+            logging.info("Update installed, restarting the assistant")
+            self.restart_requested = True
+            self._stop.set()
+
+        service = auto_update.UpdateService(idle_check=idle, on_restart=restart).start()
+        worker.on_stop(service.stop)
+        while service.is_alive():
+            service.join(1)
+            worker.beat()
+
+    def build_workers(self):
+        self.workers = [Worker('reader', self._run_reader, heartbeat_timeout=READER_HEARTBEAT_TIMEOUT,
+                               essential=True, main_thread=True)]
+        if self.devices:
+            self.workers.append(Worker('bluetooth', self._run_bluetooth,
+                                       heartbeat_timeout=BLUETOOTH_HEARTBEAT_TIMEOUT))
+        if self.updates:
+            self.workers.append(Worker('updates', self._run_updates))
+
+    # -- supervision --------------------------------------------------------
+
+    def check(self, worker):
+        """Restart a crashed or stuck worker; returns False if the supervisor should exit"""
+        if worker.alive:
+            if not worker.healthy() and not worker.stopping.is_set():
+                logging.warning(f"Worker {worker.name} stopped responding, restarting it")
+                worker.failed = True
+                worker.stop()
+            return True
+        if worker.gave_up:
+            return not worker.essential
+        if worker.next_start:
+            if time.monotonic() >= worker.next_start:
+                worker.next_start = 0.0
+                worker.start()
+            return True
+        if not worker.failed:
+            # A clean exit (the user pressed Q) ends an essential worker for good
+            return not worker.essential
+        if not worker.schedule_restart():
+            logging.error(f"Worker {worker.name} keeps failing, giving up")
+            return not worker.essential
+        logging.info(f"Restarting {worker.name} in {worker.next_start - time.monotonic():.0f} s")
+        return True
+
+    def monitor(self):
+        """Health loop on its own thread; ends the reader when the supervisor stops"""
+        try:
+            while not self._stop.is_set():
+                if not all([self.check(worker) for worker in self.workers]):
+                    break
+                self._stop.wait(HEALTH_INTERVAL)
+        except Exception:
+            logging.exception("Supervisor health check failed")
+        finally:
+            self._stop.set()
+            # Unblocks the main thread if the reader is still running
+            self.workers[0].stop()
+
+    def run(self):
+        self.build_workers()
+        reader = self.workers[0]
+        monitor = threading.Thread(target=self.monitor, name='supervisor', daemon=True)
+        try:
+            # Bluetooth and updates come up while the reader warms its engines
+            for worker in self.workers[1:]:
+                worker.start()
+            self.warm_up()
+            reader.start()
+            monitor.start()
+            # The reader's preview window needs the main thread; every
+            # (re)start the monitor asks for is run here
+            while not self._stop.is_set():
+                reader.run_pending(HEALTH_INTERVAL)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._stop.set()
+            if monitor.is_alive():
+                monitor.join(timeout=HEALTH_INTERVAL + 1)
+            self.shutdown()
+        if self.restart_requested:
+            import auto_update
+            auto_update.restart_application()
+
+    def shutdown(self):
+        for worker in self.workers:
+            worker.stop()
+        for worker in self.workers:
+            worker.join(timeout=5)
+        if self.reader is not None:
+            try:
+                self.reader.shutdown()
+            except Exception:
+                logging.exception("Reader shutdown failed")
+        print("Start times:", ", ".join(f"{kind} {seconds:.2f} s"
+                                        for kind, seconds in self.start_times) or "-")
+        print("Restarts:", {w.name: w.runs - 1 for w in self.workers})
+        metrics.shutdown()
+
+def parse_device(value):
+    mac, _, name = value.partition('=')
+    return mac.upper(), name or None
+
+def main():
+    parser = argparse.ArgumentParser(description="Run every assistant subsystem in one process")
+    parser.add_argument('--source',
+                        help="camera index, video file or folder of images "
+                             "(default: the platform's usual camera index)")
+    parser.add_argument('--camera-api', choices=['any', 'dshow', 'v4l2'],
+                        help="OpenCV capture backend (default: dshow on Windows, v4l2 on Linux)")
+    parser.add_argument('--headless', action='store_true')
+    parser.add_argument('--device', action='append', type=parse_device, default=[],
+                        help="Bluetooth device to keep connected, MAC[=name] (repeatable)")
+    parser.add_argument('--fake-bluetooth', action='store_true',
+                        help="use fake_bluetoothctl.py instead of bluetoothctl")
+    parser.add_argument('--no-updates', action='store_true')
+    parser.add_argument('--metrics', action='store_true',
+                        help=f"export stage timings to {metrics.METRICS_DIR} "
+                             "(also enabled by STEWARD_METRICS=1)")
+    args = parser.parse_args()
+
+    metrics.setup_logging()
+    if args.metrics:
+        metrics.enable()
+    else:
+        metrics.enable_from_env()
+
+    reader_argv = ['--headless'] if args.headless else []
+    if args.source is not None:
+        reader_argv += ['--source', args.source]
+    if args.camera_api is not None:
+        reader_argv += ['--camera-api', args.camera_api]
+    Supervisor(reader_argv, devices=args.device, updates=not args.no_updates,
+               fake_bluetooth=args.fake_bluetooth).run()
+
+if __name__ == "__main__":
+    main()